@@ -88,23 +88,23 @@ class ServiceApiGenerator(object):
         #NN self._generateMain(outfile, self._PGenr.prefix, root)
         if genStandAlone:
             self._LangGenr.generateMain(outfile, self._PGenr.prefix, root)
-        outfile.close()
-        if self._PGenr.subclassFilename:
-            self._generateSubclasses(root, self._PGenr.subclassFilename, behaviorFilename,
-                prefix, superModule)
 
         # Generate __all__.  When using the parser as a module it is useful
         # to isolate important classes from internal ones. This way one
         # can do a reasonably safe "from parser import *"
+        # It is written before the file is closed, so that the file is
+        #   only written once (see --write-if-changed).
         if outfileName: 
             exportableClassList = ['"%s"' % self._PGenr.mapName(self._PGenr.cleanupName(CamelCase(name))) 
                 for name in self._PGenr.AlreadyGenerated]
             exportableClassList.sort()
             exportableClassNames = ',\n    '.join(exportableClassList)
             exportLine = "\n__all__ = [\n    %s\n    ]\n" % exportableClassNames
-            outfile = open(outfileName, "a")
             outfile.write(exportLine)
-            outfile.close()
+        outfile.close()
+        if self._PGenr.subclassFilename:
+            self._generateSubclasses(root, self._PGenr.subclassFilename, behaviorFilename,
+                prefix, superModule)
 
     def _generateMain(self, outfile, prefix, root):
         name = self._PGenr.RootElement or root.getChildren()[0].getName()
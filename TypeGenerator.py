@@ -2,9 +2,181 @@ import os
 import time
 import logging
 import textwrap
+import tokenize
+import StringIO
 from pprint import pformat
 from collections import OrderedDict
 
+# Module level helpers of the generated exportDict methods.
+EXPORT_DICT_HELPERS = '''
+
+export_dict_scalars = (type(None), bool, int, long, float, basestring)
+
+
+def export_dict_value(value):
+    """
+    Convert value to plain lists and dicts, recursively.  Generated
+    objects are converted by their exportDict method.
+    """
+    if isinstance(value, GeneratedsSuper):
+        return value.exportDict(name_=None)
+    if isinstance(value, export_dict_scalars):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [export_dict_value(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, export_dict_value(item))
+                    for key, item in value.iteritems())
+    if hasattr(value, 'exportDict'):
+        return value.exportDict(name_=None)
+    return export_dict_value(value.__dict__)
+
+
+def export_dict_list(objs):
+    """
+    Bulk exportDict: return the dicts of a list of objects.
+    """
+    return [export_dict_value(obj) for obj in objs]
+
+'''
+
+# Module level helpers of the classes generated with --use-slots.
+SLOTS_HELPERS = '''
+def slots_getstate(self):
+    """
+    Pickle and copy support for the classes with __slots__.
+    """
+    state = dict(getattr(self, '__dict__', None) or {})
+    for cls in type(self).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if name != 'hash_' and hasattr(self, name):
+                state[name] = getattr(self, name)
+    return state
+
+
+def slots_setstate(self, state):
+    for name, value in state.iteritems():
+        setattr(self, name, value)
+
+'''
+
+# Module level helper of the classes generated with --cached-hash.
+CACHED_HASH_HELPERS = '''
+# hash_epoch_[0] counts the changes made through the generated setters,
+#   adders, inserters and deleters of any object.  A cached hash is only
+#   used in the epoch it was computed in, so that a change to a nested
+#   object also drops the cached hashes of the objects holding it.
+hash_epoch_ = [0]
+
+'''
+
+# Module level helper of the generated validate_all methods.
+VALIDATE_ALL_HELPERS = '''
+
+def validate_all(value):
+    """
+    Bulk validation: run the simpleType validators on the members of
+    value, a generated object or a list of them, and of all the objects
+    they contain.  Raises ValueError on the first invalid member.
+    """
+    if isinstance(value, GeneratedsSuper):
+        value.validate_all()
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            validate_all(item)
+
+'''
+
+# Module level helpers of the export_xml methods generated with
+#   --buffered-export.
+EXPORT_BUFFER_HELPERS = '''
+class export_buffer(list):
+    """
+    The XML written by the export_xml methods of an object and of the
+    objects it contains, written to the output file at once by the
+    export_xml of the outermost object.
+    """
+    write = list.append
+
+
+# Indentation of the elements at the first levels.
+export_indents = tuple('    ' * level for level in range(16))
+
+
+def export_indent(level, pretty_print):
+    if not pretty_print:
+        return ''
+    if level < len(export_indents):
+        return export_indents[level]
+    return '    ' * level
+
+'''
+
+# Statements of the export methods and their replacement in the ones
+#   generated with --buffered-export.
+BUFFERED_EXPORT_REWRITES = (
+    ('showIndent(outfile, level, pretty_print)', 'outfile.write(indent_)'),
+    ('already_processed = []', 'already_processed = set()'),
+    ('already_processed.append(', 'already_processed.add('),
+    )
+
+# Module level helpers of the generated build methods.
+BUILD_HELPERS = '''
+
+# Local names of the element tags met by the build methods, by tag.
+build_tag_names = {}
+
+
+def build_tag_name(tag):
+    """
+    Return the local name of an element tag, without its namespace.
+    """
+    name = Tag_pattern_.match(tag).groups()[-1]
+    if len(build_tag_names) < 1024:
+        build_tag_names[tag] = name
+    return name
+
+'''
+
+# The __init__ module of the package generated with --lazy-xsd.
+LAZY_XSD_INIT = '''"""
+This package defines the classes for types defined in :doc:`vnc_cfg.xsd`
+
+Each class is defined in a module of the package, along with the classes
+that refer to it and that it refers to.  The module is imported on the
+first access to one of its classes.
+"""
+import importlib
+import sys
+import types
+
+from ._base import *
+
+class_modules = {
+%s    }
+
+
+class LazyModule(types.ModuleType):
+    """
+    The package, importing the module of a class on the first access to
+    the class.
+    """
+    def __getattr__(self, name):
+        module = class_modules.get(name)
+        if module is None:
+            raise AttributeError(name)
+        value = getattr(importlib.import_module('.' + module, __name__), name)
+        setattr(self, name, value)
+        return value
+%s
+lazy_module = LazyModule(__name__, __doc__)
+lazy_module.__dict__.update(globals())
+# Python clears the globals of a module when it is released, and the
+#   functions of this module still use them.
+lazy_module.module_ = sys.modules[__name__]
+sys.modules[__name__] = lazy_module
+'''
+
 def escape_string(instring):
     s1 = instring
     s1 = s1.replace('\\', '\\\\')
@@ -15,8 +187,12 @@ class TypeGenerator(object):
     def __init__(self, parser_generator):
         self._PGenr = parser_generator
         self._genStandAlone = True
+        self._lang = None
+        # With --lazy-xsd, the text of each generated class, by name.
+        self._classTexts = None
 
     def setLanguage(self, lang):
+        self._lang = lang
         if (lang == 'py'):
             self._LangGenr = PyGenerator(self._PGenr)
         elif (lang == 'c++'):
@@ -35,6 +211,17 @@ class TypeGenerator(object):
         #   because it produces data structures needed during generation of
         #   subclasses.
         outfile = None
+        packageDir = None
+        if (self._PGenr.LazyXsd and outfileName and not genStandAlone and
+                self._lang == 'py'):
+            # Generate a package instead of the module: its _base module
+            #   gets what is written here, the classes go to modules of
+            #   their own (see _generateLazyPackage).
+            packageDir = os.path.splitext(outfileName)[0]
+            if not os.path.isdir(packageDir):
+                os.makedirs(packageDir)
+            self._classTexts = OrderedDict()
+            outfileName = os.path.join(packageDir, '_base.py')
         if outfileName:
             outfile = self._PGenr.makeFile(outfileName)
         if not outfile:
@@ -53,6 +240,9 @@ class TypeGenerator(object):
         outfile.write('"""\n')
         outfile.write("import json\n")
         outfile.write("from generatedssuper import *\n")
+        self._LangGenr.generateExportDictHelpers(wrt)
+        self._LangGenr.generateValidatorTables(wrt)
+        self._LangGenr.generateBuildHelpers(wrt)
         self._generateFromTree(wrt, self._PGenr.prefix, elements, processed)
         while 1:
             if len(self._PGenr.DelayedElements) <= 0:
@@ -84,22 +274,103 @@ class TypeGenerator(object):
         #NN self._generateMain(outfile, self._PGenr.prefix, root)
         if genStandAlone:
             self._LangGenr.generateMain(outfile, self._PGenr.prefix, root)
-        outfile.close()
-        if self._PGenr.subclassFilename:
-            self._generateSubclasses(root, self._PGenr.subclassFilename, behaviorFilename,
-                prefix, superModule)
 
         # Generate __all__.  When using the parser as a module it is useful
         # to isolate important classes from internal ones. This way one
         # can do a reasonably safe "from parser import *"
+        # It is written before the file is closed, so that the file is
+        #   only written once (see --write-if-changed).
         if outfileName: 
             exportableClassList = ['"%s"' % self._PGenr.mapName(self._PGenr.cleanupName(name)) 
                 for name in self._PGenr.AlreadyGenerated]
             exportableClassList.sort()
             exportableClassNames = ',\n    '.join(exportableClassList)
             exportLine = "\n__all__ = [\n    %s\n    ]\n" % exportableClassNames
-            outfile = open(outfileName, "a")
-            outfile.write(exportLine)
+            if packageDir:
+                self._generateLazyPackage(packageDir, exportLine)
+            else:
+                outfile.write(exportLine)
+        outfile.close()
+        self._classTexts = None
+        if self._PGenr.subclassFilename:
+            self._generateSubclasses(root, self._PGenr.subclassFilename, behaviorFilename,
+                prefix, superModule)
+
+    def _generateLazyPackage(self, packageDir, exportLine):
+        """ Write the classes generated with --lazy-xsd to the modules of
+            packageDir, one module per group of classes that refer to each
+            other, and the __init__ module that imports them on demand.
+        """
+        classTexts = self._classTexts
+        order = dict((name, index) for index, name in enumerate(classTexts))
+        refs = {}
+        for name, text in classTexts.items():
+            tokens = tokenize.generate_tokens(StringIO.StringIO(text).readline)
+            names = set(token[1] for token in tokens
+                        if token[0] == tokenize.NAME)
+            refs[name] = sorted(names.intersection(classTexts).difference(
+                [name]), key=order.get)
+        # The groups are the strongly connected components of refs
+        #   (Tarjan's algorithm), found after the groups they refer to.
+        groups = []
+        index = {}
+        lowlink = {}
+        stack = []
+        onStack = set()
+        def visit(name):
+            index[name] = lowlink[name] = len(index)
+            stack.append(name)
+            onStack.add(name)
+            for ref in refs[name]:
+                if ref not in index:
+                    visit(ref)
+                    lowlink[name] = min(lowlink[name], lowlink[ref])
+                elif ref in onStack:
+                    lowlink[name] = min(lowlink[name], index[ref])
+            if lowlink[name] == index[name]:
+                group = []
+                while not group or group[-1] != name:
+                    group.append(stack.pop())
+                    onStack.discard(group[-1])
+                groups.append(sorted(group, key=order.get))
+        for name in classTexts:
+            if name not in index:
+                visit(name)
+        modules = {}
+        for group in groups:
+            for name in group:
+                modules[name] = '_' + group[0]
+        for group in groups:
+            module = modules[group[0]]
+            outfile = self._PGenr.makeFile(
+                os.path.join(packageDir, module + '.py'))
+            if not outfile:
+                continue
+            wrt = outfile.write
+            wrt('"""\n')
+            if len(group) == 1:
+                wrt('This module defines the class %s of the package.\n' % (
+                    group[0], ))
+            else:
+                wrt('This module defines the classes %s of the package.\n' %
+                    (', '.join(group), ))
+            wrt('"""\n')
+            wrt('from ._base import *\n')
+            imported = set()
+            for name in group:
+                for ref in refs[name]:
+                    if modules[ref] != module and ref not in imported:
+                        imported.add(ref)
+                        wrt('from .%s import %s\n' % (modules[ref], ref))
+            wrt('\n\n')
+            for name in group:
+                wrt(classTexts[name])
+            outfile.close()
+        outfile = self._PGenr.makeFile(os.path.join(packageDir, '__init__.py'))
+        if outfile:
+            classModules = ''.join("    '%s': '%s',\n" % (name, modules[name])
+                                   for name in sorted(modules))
+            outfile.write(LAZY_XSD_INIT % (classModules, exportLine))
             outfile.close()
 
     def _generateMain(self, outfile, prefix, root):
@@ -156,6 +427,9 @@ class TypeGenerator(object):
             return
         self._PGenr.ElementsForSubclasses.append(element)
         name = element.getCleanName()
+        if self._classTexts is not None:
+            classfile = StringIO.StringIO()
+            wrt = classfile.write
         self._LangGenr.generateClassDefLine(wrt, parentName, prefix, name,
                                             self._openapi_dict)
         # If this element has documentation, generate a doc-string.
@@ -169,10 +443,13 @@ class TypeGenerator(object):
         if parentName and parentName in self._PGenr.AlreadyGenerated:
             superclass_name = self._PGenr.mapName(self._PGenr.cleanupName(parentName))
         self._LangGenr.generateSubSuperInit(wrt, superclass_name)
+        self._LangGenr.generateSlots(wrt, element)
         self._LangGenr._generateAttrMetadata(wrt, element)
         s4 = self._LangGenr.generateCtor(wrt, element)
         self._LangGenr.generateFactory(wrt, prefix, name)
+        self._LangGenr.generateFromParams(wrt, prefix, element)
         self._generateGettersAndSetters(wrt, element)
+        self._LangGenr.generateValidateAll(wrt, element)
         self._LangGenr.generateComparators(wrt, element)
         self._LangGenr._generateTestHelpers (wrt, element)
         if self._PGenr.Targetnamespace in self._PGenr.NamespacesDict:
@@ -185,6 +462,8 @@ class TypeGenerator(object):
         self._generateBuildFn(wrt, prefix, element, delayed)
         self._generateUserMethods(wrt, element)
         self._LangGenr.generateEnd(wrt, name, s4)
+        if self._classTexts is not None:
+            self._classTexts[prefix + name] = classfile.getvalue()
     # end _generateClasses
 
     def _generateGettersAndSetters(self, wrt, element):
@@ -889,6 +1168,87 @@ class PyGenerator(object):
         wrt('            return %s%s(*args_, **kwargs_)\n' % (prefix, name))
         wrt('    factory = staticmethod(factory)\n')
 
+    def generateFromParams(self, wrt, prefix, element):
+        """ from_params(params) builds the same object as the constructor
+            called with params_dict=params, without the constructor's
+            exception handling for missing keys.  Extensions, mixed
+            content and xsd:any children are left to the constructor.
+        """
+        name = element.getCleanName()
+        wrt('    @classmethod\n')
+        wrt('    def from_params(cls, params):\n')
+        parentName, parent = self._PGenr.getParentName(element)
+        if parentName or element.isMixed() or any(
+                child.getType() == self._PGenr.AnyTypeIdentifier
+                for child in element.getChildren()):
+            wrt('        return cls(params_dict=params)\n')
+            return
+        wrt('        if cls is not %s%s:\n' % (prefix, name))
+        wrt('            return cls(params_dict=params)\n')
+        wrt('        obj = cls.__new__(cls)\n')
+        if element.getChildren():
+            wrt('        get = (params or {}).get\n')
+        attrDefs = element.getAttributeDefs()
+        for key in attrDefs:
+            attrDef = attrDefs[key]
+            mappedName = self._PGenr.cleanupName(attrDef.getName())
+            mappedName = self._PGenr.mapName(mappedName)
+            pythonType = self._PGenr.SchemaToPythonTypeMap.get(attrDef.getType())
+            try:
+                atype = attrDef.getData_type()
+            except KeyError:
+                atype = self._PGenr.StringType
+            default = self.getMappedDefault(atype, attrDef.getDefault())
+            wrt('        obj.%s = cast_(%s, %s)\n' % (mappedName, pythonType, default))
+        for child in element.getChildren():
+            arg_name = self._PGenr.cleanupName(child.getCleanName())
+            child_type = child.getType()
+            if child.getMaxOccurs() > 1:
+                if child.isComplex():
+                    wrt("        value = get(u'%s')\n" % arg_name)
+                    wrt('        if not value:\n')
+                    wrt('            obj.%s = []\n' % arg_name)
+                    wrt('        elif isinstance(value[0], dict):\n')
+                    wrt('            obj.%s = [%s.from_params(elem) for elem in value]\n' % (
+                        arg_name, child_type))
+                    wrt('        else:\n')
+                    wrt('            obj.%s = value\n' % arg_name)
+                else:
+                    wrt("        obj.%s = get(u'%s') or []\n" % (arg_name, arg_name))
+                continue
+            default = self.getMappedDefault(child_type, child.getDefault())
+            if default == 'None':
+                getter = "get(u'%s')" % arg_name
+            else:
+                getter = "get(u'%s', %s)" % (arg_name, default)
+            typeObj = self._PGenr.ElementDict.get(child_type)
+            if (child.getDefault() and
+                typeObj is not None and
+                typeObj.getSimpleContent()):
+                wrt('        value = %s\n' % getter)
+                wrt('        if value is None:\n')
+                wrt("            value = globals()['%s']('%s')\n" % (
+                    child_type, child.getDefault(), ))
+                wrt('        obj.%s = value\n' % arg_name)
+            elif child.isComplex():
+                wrt('        value = %s\n' % getter)
+                wrt('        if isinstance(value, dict):\n')
+                wrt('            value = %s.from_params(value)\n' % child_type)
+                wrt('        obj.%s = value\n' % arg_name)
+            else:
+                wrt('        obj.%s = %s\n' % (arg_name, getter))
+        eltype = element.getType()
+        if (element.getSimpleContent() or
+            eltype in self._PGenr.SimpleTypeDict or
+            self._PGenr.CurrentNamespacePrefix + eltype in self._PGenr.OtherSimpleTypes
+            ):
+            wrt('        obj.valueOf_ = None\n')
+        if element.getAnyAttribute():
+            wrt('        obj.anyAttributes_ = {}\n')
+        if element.getExtended():
+            wrt('        obj.extensiontype_ = None\n')
+        wrt('        return obj\n')
+
     def generateElemDoc(self, wrt, element):
         s2 = ' '.join(element.documentation.strip().split())
         s2 = s2.encode('utf-8')
@@ -1191,19 +1551,39 @@ class PyGenerator(object):
         wrt('    def get%s(self): return self.%s\n' % (capName, name))
 
     def generateSetter(self, wrt, capName, name, childType):
+        if self._PGenr.CachedHash:
+            wrt('    def set%s(self, %s):\n' % (capName, name))
+            wrt('        self.%s = %s\n' % (name, name))
+            wrt('        hash_epoch_[0] += 1\n')
+            return
         wrt('    def set%s(self, %s): self.%s = %s\n' % 
                 (capName, name, name, name))
 
 
     def generateAdder(self, wrt, capName, name):
+        if self._PGenr.CachedHash:
+            wrt('    def add%s(self, value):\n' % (capName, ))
+            wrt('        self.%s.append(value)\n' % (name, ))
+            wrt('        hash_epoch_[0] += 1\n')
+            return
         wrt('    def add%s(self, value): self.%s.append(value)\n' % 
             (capName, name))
 
     def generateInserter(self, wrt, capName, name):
+        if self._PGenr.CachedHash:
+            wrt('    def insert%s(self, index, value):\n' % (capName, ))
+            wrt('        self.%s[index] = value\n' % (name, ))
+            wrt('        hash_epoch_[0] += 1\n')
+            return
         wrt('    def insert%s(self, index, value): self.%s[index] = value\n' % 
             (capName, name))
 
     def generateDeleter(self, wrt, capName, name):
+        if self._PGenr.CachedHash:
+            wrt('    def delete%s(self, value):\n' % (capName, ))
+            wrt('        self.%s.remove(value)\n' % (name, ))
+            wrt('        hash_epoch_[0] += 1\n')
+            return
         wrt('    def delete%s(self, value): self.%s.remove(value)\n' % 
             (capName, name))
 
@@ -1248,32 +1628,45 @@ class PyGenerator(object):
                 retrieved = 1
         if not retrieved:
             st = self._PGenr.SimpleTypeDict.get(stName)
-            if st and st.getBase() == "xsd:string" and st.values:
-                s1 = '        error = False\n'
+            kind = self._getValidatorKind(stName)
+            if kind == 'values':
+                s1 = "        values = simple_type_values['%s']\n" % stName
                 s1+= '        if isinstance(value, list):\n'
-                s1+= '            error = set(value) - set(' + str(st.values) +')\n'
+                s1+= '            error = not values.issuperset(value)\n'
                 s1+= '        else:\n'
-                s1+= '            error = value not in ' + str(st.values) + '\n'
+                s1+= '            error = value not in values\n'
                 s1+= '        if error:\n'
                 errorStr = stName + ' must be one of ' + str(st.values)
                 s1+= '            raise ValueError("' + errorStr + '")\n'
-            elif st and st.getBase() == "xsd:integer" and st.values:
-                s1 = '        error = False\n'
-                s1+= '        if isinstance(value, list):\n'
-                s1+= '            v_int = map(int, value)\n'
-                s1+= '            v1, v2 = min(v_int), max(v_int)\n'
-                s1+= '        else:\n'
-                s1+= '            v1, v2 = int(value), int(value)\n'
-                if isinstance(st.values[0], dict):
-                    if st.values[0]['minimum']:
-                        s1+= '        error = (%s > v1)\n' % st.values[0]['minimum']
-                elif st.values[0]:
-                    s1+= '        error = (%s > v1)\n' % st.values[0]
-                if isinstance(st.values[1], dict):
-                    if st.values[1]['maximum']:
-                        s1+= '        error |= (v2 > %s)\n' % st.values[1]['maximum']
-                elif st.values[1]:
-                    s1+= '        error |= (v2 > %s)\n' % st.values[1]
+            elif kind == 'bounds':
+                minimum, maximum = self._getValidatorBounds(st)
+                s1 = ''
+                if minimum is not None and maximum is not None:
+                    s1+= "        minimum, maximum = simple_type_bounds['%s']\n" % stName
+                    s1+= '        if isinstance(value, list):\n'
+                    s1+= '            ints = map(int, value)\n'
+                    s1+= '            error = bool(ints) and (min(ints) < minimum or max(ints) > maximum)\n'
+                    s1+= '        else:\n'
+                    s1+= '            error = not minimum <= int(value) <= maximum\n'
+                elif minimum is not None:
+                    s1+= "        minimum = simple_type_bounds['%s'][0]\n" % stName
+                    s1+= '        if isinstance(value, list):\n'
+                    s1+= '            error = bool(value) and min(map(int, value)) < minimum\n'
+                    s1+= '        else:\n'
+                    s1+= '            error = int(value) < minimum\n'
+                elif maximum is not None:
+                    s1+= "        maximum = simple_type_bounds['%s'][1]\n" % stName
+                    s1+= '        if isinstance(value, list):\n'
+                    s1+= '            error = bool(value) and max(map(int, value)) > maximum\n'
+                    s1+= '        else:\n'
+                    s1+= '            error = int(value) > maximum\n'
+                else:
+                    # No bound, only check that value is an integer.
+                    s1+= '        if isinstance(value, list):\n'
+                    s1+= '            map(int, value)\n'
+                    s1+= '        else:\n'
+                    s1+= '            int(value)\n'
+                    return s1
                 errorStr = (stName + ' must be in the range %s-%s' %
                             (st.values[0], st.values[1]))
                 s1+= '        if error:\n'
@@ -1282,16 +1675,136 @@ class PyGenerator(object):
                 s1 = '        pass\n'
         return s1
 
+    def _getValidatorKind(self, stName):
+        """ Return 'values' if the generated validator of simpleType stName
+            checks an enumeration, 'bounds' if it checks an integer range,
+            or None.
+        """
+        st = self._PGenr.SimpleTypeDict.get(stName)
+        if not st or not st.values:
+            return None
+        if st.getBase() == "xsd:string":
+            return 'values'
+        if st.getBase() == "xsd:integer":
+            return 'bounds'
+        return None
+
+    def _getValidatorBounds(self, st):
+        """ Return the (minimum, maximum) checked by the validator of an
+            integer simpleType, None for no bound.  As a missing bound, a
+            bound of 0 is not checked.
+        """
+        bounds = []
+        for value, key in zip(st.values[:2], ('minimum', 'maximum')):
+            if isinstance(value, dict):
+                value = value[key]
+            bounds.append(value if value else None)
+        return tuple(bounds)
+
+    def _hasValidator(self, stName):
+        """ Return True if the validator of simpleType stName checks
+            anything.
+        """
+        if self._getValidatorKind(stName):
+            return True
+        if self._PGenr.ValidatorBodiesBasePath:
+            path = '%s%s%s' % (self._PGenr.ValidatorBodiesBasePath, os.sep,
+                               stName)
+            return os.path.exists(path + '.py') or os.path.exists(path)
+        return False
+
+    def generateValidatorTables(self, wrt):
+        wrt('# Values of the enumerated simpleTypes and (minimum, maximum) of the\n')
+        wrt('#   integer ones, checked by the validate_<type> methods.\n')
+        wrt('simple_type_values = {\n')
+        for stName in sorted(self._PGenr.SimpleTypeDict):
+            if self._getValidatorKind(stName) == 'values':
+                st = self._PGenr.SimpleTypeDict[stName]
+                wrt("    '%s': frozenset(%s),\n" % (stName, st.values))
+        wrt('    }\n')
+        wrt('simple_type_bounds = {\n')
+        for stName in sorted(self._PGenr.SimpleTypeDict):
+            if self._getValidatorKind(stName) == 'bounds':
+                st = self._PGenr.SimpleTypeDict[stName]
+                wrt("    '%s': (%s, %s),\n" % (
+                    (stName, ) + self._getValidatorBounds(st)))
+        wrt('    }\n')
+        wrt(VALIDATE_ALL_HELPERS)
+
+    def _validateAllMembers(self, element, members):
+        """ Add to members the code validating the members set by the
+            constructor of element, keyed by member name.  The members
+            set by the constructor of its base are not added.
+        """
+        for attrDef in element.getAttributeDefs().values():
+            typeName = attrDef.getType()
+            if (typeName in self._PGenr.SimpleTypeDict and
+                    self._hasValidator(typeName)):
+                name = self._PGenr.mapName(
+                    self._PGenr.cleanupName(attrDef.getName()))
+                members[name] = (
+                    '        if self.%s is not None:\n'
+                    '            self.validate_%s(self.%s)\n' % (
+                        name, typeName, name))
+        for child in element.getChildren():
+            if child.getType() == self._PGenr.AnyTypeIdentifier:
+                members['anytypeobjs_'] = (
+                    '        validate_all(self.anytypeobjs_)\n')
+                continue
+            name = self._PGenr.cleanupName(child.getCleanName())
+            typeName = child.getSimpleType()
+            if child.isComplex():
+                members[name] = '        validate_all(self.%s)\n' % name
+            elif (typeName in self._PGenr.SimpleTypeDict and
+                    self._hasValidator(typeName)):
+                members[name] = (
+                    '        if self.%s is not None:\n'
+                    '            self.validate_%s(self.%s)\n' % (
+                        name, typeName, name))
+
+    def generateValidateAll(self, wrt, element):
+        members = {}
+        bases = list(self._PGenr.getTypeInfo(element).getBases())
+        for base in reversed(bases):
+            self._validateAllMembers(base, members)
+        self._validateAllMembers(element, members)
+        wrt('    def validate_all(self):\n')
+        if not members:
+            wrt('        pass\n')
+        for name in sorted(members):
+            wrt(members[name])
+
+    def _exportWriter(self, wrt):
+        """ Return the wrt of the export methods, which rewrites their
+            statements for --buffered-export.
+        """
+        if not self._PGenr.BufferedExport:
+            return wrt
+        def write(s):
+            for old, new in BUFFERED_EXPORT_REWRITES:
+                s = s.replace(old, new)
+            wrt(s)
+        return write
+
     def generateExport(self, wrt, namespace, element):
+        wrt = self._exportWriter(wrt)
         childCount = self._PGenr.countChildren(element, 0)
         name = element.getName()
         base = element.getBase()
         wrt("    def export_xml(self, outfile, level=1, namespace_='%s', name_='%s', namespacedef_='', pretty_print=True):\n" % \
             (namespace, name, ))
+        if self._PGenr.BufferedExport:
+            wrt('        if not isinstance(outfile, export_buffer):\n')
+            wrt('            buffer_ = export_buffer()\n')
+            wrt('            self.export_xml(buffer_, level, namespace_, name_, namespacedef_, pretty_print)\n')
+            wrt("            outfile.write(''.join(buffer_))\n")
+            wrt('            return\n')
         wrt('        if pretty_print:\n')
         wrt("            eol_ = '\\n'\n")
         wrt('        else:\n')
         wrt("            eol_ = ''\n")
+        if self._PGenr.BufferedExport:
+            wrt('        indent_ = export_indent(level, pretty_print)\n')
         wrt('        showIndent(outfile, level, pretty_print)\n')
         wrt("        outfile.write('<%s%s%s' % (namespace_, name_, namespacedef_ and ' ' + namespacedef_ or '', ))\n")
         wrt("        already_processed = []\n")
@@ -1325,6 +1838,7 @@ class PyGenerator(object):
             wrt("            outfile.write('/>%s' % (eol_, ))\n")
 
     def generateExportAttributesFn(self, wrt, namespace, element):
+        wrt = self._exportWriter(wrt)
         name = element.getName()
         wrt("    def exportAttributes(self, outfile, level, already_processed, namespace_='%s', name_='%s'):\n" % \
             (namespace, name, ))
@@ -1422,6 +1936,7 @@ class PyGenerator(object):
     # end generateExportAttributes
 
     def generateExportChildrenFn(self, wrt, namespace, element):
+        wrt = self._exportWriter(wrt)
         childCount = self._PGenr.countChildren(element, 0)
         name = element.getName()
         wrt("    def exportChildren(self, outfile, level, namespace_='%s', name_='%s', fromsubclass_=False, pretty_print=True):\n" % \
@@ -1488,6 +2003,8 @@ class PyGenerator(object):
                 wrt("%s    eol_ = '\\n'\n" % (fill, ))
                 wrt('%selse:\n' % (fill, ))
                 wrt("%s    eol_ = ''\n" % (fill, ))
+                if self._PGenr.BufferedExport:
+                    wrt('%sindent_ = export_indent(level, pretty_print)\n' % (fill, ))
                 any_type_child = None
                 for child in element.getChildren():
                     unmappedName = child.getName()
@@ -1751,13 +2268,115 @@ class PyGenerator(object):
             wrt(s1)
     # end generateExportFn_3
 
+    def generateExportDictHelpers(self, wrt):
+        wrt(EXPORT_DICT_HELPERS)
+        if self._PGenr.UseSlots or self._PGenr.CachedHash:
+            wrt(SLOTS_HELPERS)
+        if self._PGenr.CachedHash:
+            wrt(CACHED_HASH_HELPERS)
+        if self._PGenr.BufferedExport:
+            wrt(EXPORT_BUFFER_HELPERS)
+
+    def _ctorMembers(self, element, members, nested):
+        """ Add the names of the members the constructor of element sets
+            to members, and those that do not hold a scalar to nested.
+            The members set by the constructor of its base are not added.
+        """
+        for attrDef in element.getAttributeDefs().values():
+            members.add(self._PGenr.mapName(
+                self._PGenr.cleanupName(attrDef.getName())))
+        for child in element.getChildren():
+            if child.getType() == self._PGenr.AnyTypeIdentifier:
+                name = 'anytypeobjs_'
+            else:
+                name = self._PGenr.cleanupName(child.getCleanName())
+            members.add(name)
+            if (child.getType() == self._PGenr.AnyTypeIdentifier or
+                    child.isComplex() or child.getMaxOccurs() > 1):
+                nested.add(name)
+        eltype = element.getType()
+        if (element.getSimpleContent() or
+            element.isMixed() or
+            eltype in self._PGenr.SimpleTypeDict or
+            self._PGenr.CurrentNamespacePrefix + eltype in self._PGenr.OtherSimpleTypes
+            ):
+            members.add('valueOf_')
+        if element.getAnyAttribute():
+            members.add('anyAttributes_')
+            nested.add('anyAttributes_')
+        if element.getExtended():
+            members.add('extensiontype_')
+        if element.isMixed():
+            members.update(['mixedclass_', 'content_'])
+            nested.add('content_')
+
+    def _exportDictMembers(self, element):
+        """ Return the names of the members of element, including the
+            ones set by its bases, and the names of those that do not hold
+            a scalar.
+        """
+        members = set()
+        nested = set()
+        self._ctorMembers(element, members, nested)
+        for base in self._PGenr.getTypeInfo(element).getBases():
+            self._ctorMembers(base, members, nested)
+        return members, sorted(nested)
+
+    def generateSlots(self, wrt, element):
+        parentName, parent = self._PGenr.getParentName(element)
+        # The hash cached by --cached-hash is kept in a slot, so that it
+        #   does not show in the __dict__ of the object.
+        members = set()
+        if self._PGenr.CachedHash and not parentName:
+            members.add('hash_')
+        if self._PGenr.UseSlots:
+            inherited = set()
+            for base in self._PGenr.getTypeInfo(element).getBases():
+                self._ctorMembers(base, inherited, set())
+            self._ctorMembers(element, members, set())
+            members -= inherited
+        elif not members:
+            return
+        slots = ''.join("'%s', " % name for name in sorted(members))
+        wrt('    __slots__ = (%s)\n' % slots.rstrip())
+        if not parentName:
+            wrt('    __getstate__ = slots_getstate\n')
+            wrt('    __setstate__ = slots_setstate\n')
+
     def generateExportDict(self, wrt, element):
         name = element.getName()
-        base = element.getBase()
+        members, nested = self._exportDictMembers(element)
+        if not self._PGenr.UseSlots:
+            # The members exportDict converts without going through all
+            #   of __dict__.
+            names = ', '.join("'%s'" % member for member in sorted(members))
+            wrt('    export_dict_members_ = frozenset((%s%s))\n' % (
+                names, ',' if len(members) == 1 else ''))
         wrt("    def exportDict(self, name_='%s'):\n" % (name, ))
-        wrt('        # do obj->json->dict to handle nested complextype in object\n')
-        wrt('        obj_json = json.dumps(self, default=lambda o: dict((k, v) for k, v in o.__dict__.iteritems()))\n')
-        wrt('        obj_dict = json.loads(obj_json)\n')
+        if self._PGenr.UseSlots:
+            wrt('        obj_dict = {\n')
+            for member in sorted(members):
+                if member in nested:
+                    wrt("            '%s': export_dict_value(self.%s),\n" % (
+                        member, member))
+                else:
+                    wrt("            '%s': self.%s,\n" % (member, member))
+            wrt('            }\n')
+            wrt('        if name_:\n')
+            wrt('            return {name_: obj_dict}\n')
+            wrt('        return obj_dict\n')
+            return
+        wrt('        obj_dict = self.__dict__.copy()\n')
+        if nested:
+            wrt('        if obj_dict.viewkeys() == self.export_dict_members_:\n')
+            for member in nested:
+                wrt("            obj_dict['%s'] = export_dict_value(obj_dict['%s'])\n" % (
+                    member, member))
+            wrt('        else:\n')
+        else:
+            wrt('        if obj_dict.viewkeys() != self.export_dict_members_:\n')
+        wrt('            # Members added at run time, convert all of them.\n')
+        wrt('            obj_dict = export_dict_value(obj_dict)\n')
         wrt('        if name_:\n')
         wrt('            return {name_: obj_dict}\n')
         wrt('        return obj_dict\n')
@@ -1775,9 +2394,12 @@ class PyGenerator(object):
             wrt("                MixedContainer.TypeNone, '', node.text)\n")
             wrt("            self.content_.append(obj_)\n")
         wrt('        for child in node:\n')
-        wrt("            nodeName_ = Tag_pattern_.match(child.tag).groups()[-1]\n")
+        wrt("            nodeName_ = build_tag_names.get(child.tag) or build_tag_name(child.tag)\n")
         wrt("            self.buildChildren(child, node, nodeName_)\n")
 
+    def generateBuildHelpers(self, wrt):
+        wrt(BUILD_HELPERS)
+
     def generateBuildAttributesFn(self, wrt, element):
         wrt('    def buildAttributes(self, node, attrs, already_processed):\n')
         hasAttributes = 0
@@ -1896,6 +2518,11 @@ class PyGenerator(object):
         return hasAttributes
     
     def generateBuildChildren(self, wrt, element, prefix, delayed):
+        if (not element.isMixed() and
+                not any(child.getType() == self._PGenr.AnyTypeIdentifier
+                        for child in element.getChildren())):
+            self._generateBuildDispatch(wrt, prefix, element, delayed)
+            return
         wrt('    def buildChildren(self, child_, node, nodeName_, fromsubclass_=False):\n')
         keyword = 'if'
         hasChildren = 0
@@ -1915,6 +2542,63 @@ class PyGenerator(object):
         if hasChildren == 0:
             wrt("        pass\n")
 
+    def _generateBuildDispatch(self, wrt, prefix, element, delayed):
+        """ Generate buildChildren as a lookup of the child tag in the
+            buildChildren_ table of the class, which maps the tags of the
+            children to their buildChild_<name> method.
+        """
+        handlers = OrderedDict()
+        for child in element.getChildren():
+            members = [child]
+            # Does this element have a substitutionGroup?
+            #   If so generate a handler for each element in the substitutionGroup.
+            childName = child.getName()
+            if childName in self._PGenr.SubstitutionGroups:
+                for memberName in transitiveClosure(self._PGenr.SubstitutionGroups, childName):
+                    memberName = self._PGenr.cleanupName(memberName)
+                    if memberName in self._PGenr.ElementDict:
+                        members.append(self._PGenr.ElementDict[memberName])
+            for member in members:
+                tag = member.getName()
+                if tag in handlers:
+                    continue
+                lines = []
+                self._generateBuildStandard_1(lines.append, prefix, member,
+                    child, element, 'if', delayed)
+                # Drop the "if nodeName_ == ..." line of the if/elif chain
+                #   and move the body to the handler.
+                body = ''.join(lines).split('\n', 1)[1]
+                body = ''.join(line[4:] for line in body.splitlines(True))
+                handlers[tag] = body
+        elName = element.getCleanName()
+        base = element.getBase()
+        extension = base and not element.getSimpleContent()
+        wrt('    def buildChildren(self, child_, node, nodeName_, fromsubclass_=False):\n')
+        if handlers:
+            wrt('        build_ = %s%s.buildChildren_.get(nodeName_)\n' % (prefix, elName))
+            wrt('        if build_ is not None:\n')
+            wrt('            build_(self, child_, node)\n')
+        # Call buildChildren in the superclass only if it is an extension,
+        #   but *not* if it is a restriction.
+        if extension:
+            wrt("        super(%s, self).buildChildren(child_, node, nodeName_, True)\n" % (elName, ))
+        if not handlers and not extension:
+            wrt("        pass\n")
+        if not handlers:
+            return
+        names = {}
+        for tag, body in handlers.iteritems():
+            name = 'buildChild_%s' % self._PGenr.cleanupName(tag)
+            while name in names.values():
+                name += '_'
+            names[tag] = name
+            wrt('    def %s(self, child_, node):\n' % name)
+            wrt(body)
+        wrt('    buildChildren_ = {\n')
+        for tag in handlers:
+            wrt("        '%s': %s,\n" % (tag, names[tag]))
+        wrt('        }\n')
+
     def _generateBuildStandard(self, wrt, prefix, element, keyword, delayed, hasChildren):
         any_type_child = None
         for child in element.getChildren():
@@ -2328,42 +3012,38 @@ class PyGenerator(object):
         generatedSimpleTypes = []
         childCount = self._PGenr.countChildren(element, 0)
         comps = []
+        names = []
         hash_fields = []
         str_fields = []
-        copy_fields = []
         for child in element.getChildren():
             if child.getType() == self._PGenr.AnyTypeIdentifier:
                 continue
             else:
                 name = self._PGenr.cleanupName(child.getCleanName())
+                names.append(name)
                 comps.append('self.%s == other.%s' %(name, name))
                 str_fields.append('"%s = " + str(self.%s)' % (name, name))
                 if child.getMaxOccurs() > 1:
                     hash_fields.append('tuple(self.%s or [])' % name)
-                    if child.isComplex():
-                        copy_field = '[x.copy() for x in self.%s]' % name
-                    else:
-                        copy_field = 'list(self.%s)' % name
                 else:
                     hash_fields.append('self.%s' % name)
-                    if child.isComplex():
-                        copy_field = 'self.%s.copy()' % name
-                    else:
-                        copy_field = 'self.%s' % name
-                copy_fields.append((name, copy_field))
 
         if len(comps) == 0:
             wrt('    def __eq__(self, other): return True\n')
             wrt('    def __ne__(self, other): return False\n')
             wrt('    def __hash__(self): return 0\n')
             wrt('    def __repr__(self): return ''\n')
-            wrt('    def copy(self): return %s()\n' % element.getCleanName())
+            wrt('    def diff(self, other): return []\n')
+            self.generateCopy(wrt, element)
             return
 
         comp_str = ' and\n                    '.join(comps)
         hash_str = ',\n                     '.join(hash_fields)
         str_str = ' + ", " +\n                '.join(str_fields)
         wrt('    def __eq__(self, other):\n')
+        if self._PGenr.CachedHash:
+            wrt('        if self is other:\n')
+            wrt('            return True\n')
         wrt('        if isinstance(other, self.__class__):\n')
         wrt('            return (%s)\n' % comp_str)
         wrt('        return NotImplemented\n')
@@ -2374,16 +3054,79 @@ class PyGenerator(object):
         wrt('        return NotImplemented\n')
         wrt('\n')
         wrt('    def __hash__(self):\n')
-        wrt('        return hash((%s))\n' % hash_str)
+        if self._PGenr.CachedHash:
+            # hash_ holds the epoch and the hash computed in it.
+            wrt("        cached_ = getattr(self, 'hash_', None)\n")
+            wrt('        if cached_ is not None and cached_[0] == hash_epoch_[0]:\n')
+            wrt('            return cached_[1]\n')
+            wrt('        hash_ = hash((%s))\n' % hash_str.replace(
+                '\n', '\n '))
+            wrt('        self.hash_ = (hash_epoch_[0], hash_)\n')
+            wrt('        return hash_\n')
+        else:
+            wrt('        return hash((%s))\n' % hash_str)
         wrt('\n')
         wrt('    def __repr__(self):\n')
         wrt('        return (%s)\n' % str_str)
         wrt('\n')
+        # diff() names the members compared by __eq__ that differ, for
+        #   updates that only carry the changed members.
+        wrt('    def diff(self, other):\n')
+        wrt('        changed = []\n')
+        for name in names:
+            wrt('        if self.%s != other.%s:\n' % (name, name))
+            wrt("            changed.append('%s')\n" % name)
+        wrt('        return changed\n')
+        wrt('\n')
+        self.generateCopy(wrt, element)
+
+    def _copyMembers(self, element, members):
+        """ Map the names of the members of element, without those of its
+            bases, to the expression copying them (None for the scalars).
+        """
+        ctorMembers = set()
+        self._ctorMembers(element, ctorMembers, set())
+        for name in ctorMembers:
+            members[name] = None
+        for child in element.getChildren():
+            if child.getType() == self._PGenr.AnyTypeIdentifier:
+                members['anytypeobjs_'] = 'list(self.anytypeobjs_ or ())'
+                continue
+            name = self._PGenr.cleanupName(child.getCleanName())
+            if child.getMaxOccurs() > 1:
+                if child.isComplex():
+                    expr = '[x.copy() for x in self.%s or ()]' % (name, )
+                else:
+                    expr = 'list(self.%s or ())' % (name, )
+                members[name] = expr
+            elif child.isComplex():
+                members[name] = ('self.%s.copy() if self.%s is not None '
+                                 'else None' % (name, name))
+        if element.getAnyAttribute():
+            members['anyAttributes_'] = 'dict(self.anyAttributes_ or ())'
+        if element.isMixed():
+            members['content_'] = 'list(self.content_ or ())'
+
+    def generateCopy(self, wrt, element):
+        members = {}
+        for base in reversed(list(
+                self._PGenr.getTypeInfo(element).getBases())):
+            self._copyMembers(base, members)
+        self._copyMembers(element, members)
         wrt('    def copy(self):\n')
-        wrt('        cp = %s()\n' % element.getCleanName())
-        for cp in copy_fields:
-            wrt('        if self.%s is not None:\n' % cp[0])
-            wrt('            cp.%s = %s\n' % (cp[0], cp[1]))
+        wrt('        """\n')
+        wrt('        Copy the object, and the lists and objects it holds.\n')
+        wrt('        copy.copy(obj) makes a shallow copy, which shares them.\n')
+        wrt('        """\n')
+        wrt('        cp = self.__class__.__new__(self.__class__)\n')
+        if self._PGenr.UseSlots:
+            for name in sorted(members):
+                wrt('        cp.%s = self.%s\n' % (name, name))
+        else:
+            wrt('        cp.__dict__.update(self.__dict__)\n')
+        for name, expr in sorted(members.items()):
+            if expr is not None:
+                wrt('        cp.%s = %s\n' % (name, expr))
         wrt('        return cp\n')
         wrt('\n')
 
@@ -2411,6 +3154,9 @@ class CppGenerator(object):
     def generateSubSuperInit(self, wrt, superclass_name):
         pass
 
+    def generateSlots(self, wrt, element):
+        pass
+
     def generateCtor(self, wrt, element):
         elName = element.getCleanName()
         childCount = self._PGenr.countChildren(element, 0)
@@ -2638,6 +3384,18 @@ class CppGenerator(object):
     def generateFactory(self, wrt, prefix, name):
         pass
 
+    def generateFromParams(self, wrt, prefix, element):
+        pass
+
+    def generateValidatorTables(self, wrt):
+        pass
+
+    def generateValidateAll(self, wrt, element):
+        pass
+
+    def generateBuildHelpers(self, wrt):
+        pass
+
     def generateGetter(self, wrt, capName, name, childType):
         mappedType = self._PGenr.SchemaToCppTypeMap.get(childType)
         if mappedType == None:
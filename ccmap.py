@@ -5,7 +5,9 @@
 import idl_parser
 from ifmap_model import IFMapIdentifier, IFMapMetadata, ElementXsdType
 from ifmap_classgen import IFMapClassGenerator, IFMapImplGenerator
+from ifmap_global import CRC32_TYPE, HASH64_TYPE
 from ifmap_parser import IFMapParserGenerator
+from type_parser import TypeParserGenerator
 from ifmap_frontend import IFMapApiGenerator
 from java_api import JavaApiGenerator
 from device_api import DeviceApiGenerator
@@ -137,30 +139,56 @@ class IFMapGenerator(object):
         self._Metadata[name] = meta
         return meta
 
+    def _CrcType(self):
+        if self._Parser.FastCrc:
+            return HASH64_TYPE
+        return CRC32_TYPE
+
     def _GenerateBackendClassDefinitions(self):
         hfilename = self._Parser.outFilename + '_types.h'
         hfile = self._Parser.makeFile(hfilename)
-        classgen = IFMapClassGenerator(self._cTypesDict)
+        classgen = IFMapClassGenerator(self._cTypesDict, self._CrcType())
         classgen.Generate(hfile, self._Identifiers, self._Metadata)
+        hfile.close()
 
     def _GenerateBackendClassImpl(self):
         hfilename = self._Parser.outFilename + '_types.h'
         filename = self._Parser.outFilename + '_types.cc'
         cfile = self._Parser.makeFile(filename)
-        classgen = IFMapImplGenerator(self._cTypesDict)
+        classgen = IFMapImplGenerator(self._cTypesDict, self._CrcType())
         classgen.Generate(cfile, hfilename, self._Identifiers, self._Metadata)
+        cfile.close()
+
+    def _GenerateBackendServer(self):
+        hfilename = self._Parser.outFilename + '_types.h'
         filename = self._Parser.outFilename + '_server.cc'
         sfile = self._Parser.makeFile(filename)
+        classgen = IFMapImplGenerator(self._cTypesDict, self._CrcType())
         classgen.GenerateServer(sfile, hfilename,
                                 self._Identifiers, self._Metadata)
+        parsergen = IFMapParserGenerator(self._cTypesDict)
+        parsergen.GenerateServer(sfile, self._Metadata)
+        sfile.close()
+
+    def _GenerateBackendClient(self):
+        hfilename = self._Parser.outFilename + '_types.h'
         filename = self._Parser.outFilename + '_client.cc'
         clntfile = self._Parser.makeFile(filename)
+        classgen = IFMapImplGenerator(self._cTypesDict, self._CrcType())
         classgen.GenerateClient(clntfile, hfilename,
                                 self._Identifiers, self._Metadata)
+        clntfile.close()
+
+    def _GenerateBackendAgent(self):
+        hfilename = self._Parser.outFilename + '_types.h'
         filename = self._Parser.outFilename + '_agent.cc'
-        clntfile = self._Parser.makeFile(filename)
-        classgen.GenerateAgent(clntfile, hfilename,
+        agentfile = self._Parser.makeFile(filename)
+        classgen = IFMapImplGenerator(self._cTypesDict, self._CrcType())
+        classgen.GenerateAgent(agentfile, hfilename,
                                self._Identifiers, self._Metadata)
+        parsergen = IFMapParserGenerator(self._cTypesDict)
+        parsergen.GenerateAgent(agentfile, self._Identifiers, self._Metadata)
+        agentfile.close()
 
     def _GenerateBackendParsers(self):
         hfilename = self._Parser.outFilename + '_types.h'
@@ -168,17 +196,19 @@ class IFMapGenerator(object):
         cfile = self._Parser.makeFile(cfilename)
         parsergen = IFMapParserGenerator(self._cTypesDict)
         parsergen.Generate(cfile, hfilename, self._Identifiers, self._Metadata)
-        sfilename = self._Parser.outFilename + '_server.cc'
-        sfile = open(sfilename, 'a')
-        parsergen.GenerateServer(sfile, self._Metadata)
-        sfilename = self._Parser.outFilename + '_agent.cc'
-        sfile = open(sfilename, 'a')
-        parsergen.GenerateAgent(sfile, self._Identifiers, self._Metadata)
+        cfile.close()
+        if self._Parser.ParserBench:
+            bfilename = self._Parser.outFilename + '_parser_bench.cc'
+            bfile = self._Parser.makeFile(bfilename)
+            TypeParserGenerator(self._cTypesDict).GenerateBench(bfile,
+                                                                hfilename)
+            bfile.close()
 
     def _GenerateFrontendClassDefinitions(self, xsd_root):
         apigen = IFMapApiGenerator(self._Parser, xsd_root,
                                    self._Identifiers, self._Metadata)
-        apigen.Generate(self._Parser.outFilename)
+        with self._Parser.Profile.Instrument(apigen, '_generate_'):
+            apigen.Generate(self._Parser.outFilename)
 
     def _GenerateJavaApi(self, xsd_root):
         apigen = JavaApiGenerator(self._Parser, self._cTypesDict,
@@ -208,15 +238,32 @@ class IFMapGenerator(object):
     def setLanguage(self, lang):
         pass
 
+    def setCategory(self, genCategory):
+        self._genCategory = genCategory
+
+    def prepare(self, root, infile):
+        # The data model only depends on the schema, so when several
+        # categories are generated in one run it is built once and shared
+        # by all of them.
+        if self._idl_parser is None:
+            self._idl_parser = self._Parser.IdlParser
+            children = root.getChildren()
+            with self._Parser.Profile.Phase('_BuildDataModel'):
+                self._BuildDataModel(children)
+
     def generate(self, root, infile, outFilename):
-        self._idl_parser = idl_parser.IDLParser()
-        self._idl_parser.Parse(infile)
-        children = root.getChildren()
-        self._BuildDataModel(children)
+        self.prepare(root, infile)
         if self._genCategory == 'ifmap-backend':
-            self._GenerateBackendClassDefinitions()
-            self._GenerateBackendClassImpl()
-            self._GenerateBackendParsers()
+            profile = self._Parser.Profile
+            with profile.Instrument(self, '_GenerateBackend'):
+                # Each of these writes its own files.
+                profile.RunJobs([self._GenerateBackendClassDefinitions,
+                                 self._GenerateBackendClassImpl,
+                                 self._GenerateBackendServer,
+                                 self._GenerateBackendClient,
+                                 self._GenerateBackendAgent,
+                                 self._GenerateBackendParsers],
+                                self._Parser.Jobs)
         elif self._genCategory == 'ifmap-frontend':
             self._GenerateFrontendClassDefinitions(root)
         elif self._genCategory == 'java-api':
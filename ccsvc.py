@@ -35,7 +35,13 @@ class ServiceGenerator(object):
         self._LangType = lang
         pass
 
-    def generate(self, root, infile, outFilename):
+    def setCategory(self, genCategory):
+        pass
+
+    def prepare(self, root, infile):
         children = root.getChildren()
         self._BuildDataModel(children)
+
+    def generate(self, root, infile, outFilename):
+        self.prepare(root, infile)
         self._GenerateClassDefinitions(root)
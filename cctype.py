@@ -6,6 +6,7 @@ import idl_parser
 from type_model import ComplexType, ComplexTypeLocate
 from type_classgen import TypeClassGenerator, TypeImplGenerator
 from type_parser import TypeParserGenerator
+from ifmap_global import CRC32_TYPE, HASH64_TYPE
 
 class TypeGenerator(object):
     """ Type generator
@@ -24,17 +25,22 @@ class TypeGenerator(object):
             xtypename = child.getType()
             self._complexType = ComplexTypeLocate(self._Parser.ElementDict, self._cTypesDict, xtypename)
 
+    def _CrcType(self):
+        if self._Parser.FastCrc:
+            return HASH64_TYPE
+        return CRC32_TYPE
+
     def _GenerateClassDefinitions(self):
         hfilename = self._Parser.outFilename + '_types.h'
         hfile = self._Parser.makeFile(hfilename)
-        classgen = TypeClassGenerator(self._cTypesDict)
+        classgen = TypeClassGenerator(self._cTypesDict, self._CrcType())
         classgen.Generate(hfile, self._complexType)
 
     def _GenerateClassImpl(self):
         hfilename = self._Parser.outFilename + '_types.h'
         cfilename = self._Parser.outFilename + '_types.cc'
         cfile = self._Parser.makeFile(cfilename)
-        classimpl = TypeImplGenerator(self._cTypesDict)
+        classimpl = TypeImplGenerator(self._cTypesDict, self._CrcType())
         classimpl.Generate(hfilename, cfile)
 
     def _GenerateParsers(self):
@@ -43,13 +49,23 @@ class TypeGenerator(object):
         cfile = self._Parser.makeFile(cfilename)
         parsergen = TypeParserGenerator(self._cTypesDict)
         parsergen.Generate(cfile, hfilename)
+        if self._Parser.ParserBench:
+            bfilename = self._Parser.outFilename + '_parser_bench.cc'
+            bfile = self._Parser.makeFile(bfilename)
+            parsergen.GenerateBench(bfile, hfilename)
         
     def setLanguage(self, lang):
         pass
 
-    def generate(self, root, infile, outFilename):
+    def setCategory(self, genCategory):
+        pass
+
+    def prepare(self, root, infile):
         children = root.getChildren()
         self._BuildDataModel(children)
+
+    def generate(self, root, infile, outFilename):
+        self.prepare(root, infile)
         self._GenerateClassDefinitions()
         self._GenerateClassImpl()
         self._GenerateParsers()
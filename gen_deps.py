@@ -0,0 +1,162 @@
+#
+# Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
+#
+
+"""
+Per-file dependency tracking for the generators that emit one file per
+identifier or type (java-api, golang-api, json-schema).
+
+For every file it emits, a generator names the model objects the file is
+generated from: an identifier, a ComplexType, or plain values.  The
+fingerprint of an object covers everything reachable from it (properties,
+link metadata, xsd elements, dependent types and the simple types they
+use); other identifiers are only covered by name, cpp name and default
+fully qualified name, since that is all a file uses from them.
+
+The fingerprints are stored in a state file in the output directory.  On
+the next run a file is only generated again if its fingerprint changed,
+if it is missing, or if the generator sources changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+
+from ifmap_model import IFMapIdentifier, AmbiguousParentType
+
+_STATE_FILE = '.generateDS-deps'
+
+# Attributes that refer back to the parser generator.
+_IGNORED_ATTRS = frozenset(['_PGenr'])
+
+
+def _SourceDigest(filenames):
+    digest = hashlib.sha1()
+    for filename in filenames:
+        if filename.endswith('.pyc') or filename.endswith('.pyo'):
+            filename = filename[:-1]
+        infile = open(filename, 'rb')
+        digest.update(infile.read())
+        infile.close()
+    return digest.hexdigest()
+
+
+class DependencyTracker(object):
+    def __init__(self, parser, dirname, sources):
+        """ sources lists the modules (by file name) that the output
+            depends on besides the model, typically the generator itself.
+            Tracking is disabled unless --incremental was given.
+        """
+        self._parser = parser
+        self._enabled = parser.Incremental
+        self._path = os.path.join(dirname, _STATE_FILE)
+        self._state = {}
+        self._fingerprints = {}
+        self._active = {}
+        self._cycle = sys.maxint
+        if not self._enabled:
+            return
+        import ifmap_model
+        import type_model
+        self._salt = _SourceDigest(list(sources) + [
+            __file__, ifmap_model.__file__, type_model.__file__])
+        try:
+            infile = open(self._path, 'r')
+        except IOError:
+            return
+        try:
+            state = json.load(infile)
+        except ValueError, exp:
+            logger = logging.getLogger('gen_deps')
+            logger.warning('ignoring %s: %s', self._path, exp)
+            state = {}
+        infile.close()
+        if state.get('salt') == self._salt:
+            self._state = state.get('files', {})
+
+    def IsCurrent(self, filename, *deps):
+        """ Returns True if filename exists and was generated from the same
+            deps by the same generator.  Records the fingerprint of deps
+            for filename, so the caller must generate the file when this
+            returns False.
+        """
+        if not self._enabled:
+            return False
+        digest = hashlib.sha1()
+        for dep in deps:
+            digest.update(self.Fingerprint(dep))
+        fingerprint = digest.hexdigest()
+        key = os.path.basename(filename)
+        current = (self._state.get(key) == fingerprint and
+                   os.path.exists(filename))
+        self._state[key] = fingerprint
+        return current
+
+    def Save(self):
+        if not self._enabled:
+            return
+        outfile = open(self._path, 'w')
+        json.dump({'salt': self._salt, 'files': self._state}, outfile,
+                  indent=1, sort_keys=True)
+        outfile.close()
+
+    def Fingerprint(self, obj):
+        return hashlib.sha1(repr(self._Signature(obj, True))).hexdigest()
+
+    def _Signature(self, obj, root=False):
+        if obj is None or isinstance(obj, (bool, int, long, float,
+                                           basestring)):
+            return obj
+        if isinstance(obj, (list, tuple)):
+            return tuple(self._Signature(x) for x in obj)
+        if isinstance(obj, (set, frozenset)):
+            return tuple(sorted(self._Signature(x) for x in obj))
+        if isinstance(obj, dict):
+            return tuple(sorted((self._Signature(k), self._Signature(v))
+                                for k, v in obj.iteritems()))
+        if isinstance(obj, IFMapIdentifier) and not root:
+            return self._IdentifierReference(obj)
+        if not hasattr(obj, '__dict__'):
+            return repr(obj)
+
+        key = id(obj)
+        if key in self._fingerprints:
+            return self._fingerprints[key]
+        if key in self._active:
+            # Recursive type definition.  Signatures computed below the
+            #   referenced object depend on where the walk started.
+            self._cycle = min(self._cycle, self._active[key])
+            return (obj.__class__.__name__,
+                    getattr(obj, 'name', getattr(obj, '_name', None)))
+        depth = len(self._active)
+        self._active[key] = depth
+        items = []
+        for attr, value in sorted(vars(obj).iteritems()):
+            if attr in _IGNORED_ATTRS:
+                continue
+            items.append((attr, self._Signature(value)))
+        if hasattr(obj, '_PGenr'):
+            # xsd element: the simple type definitions it refers to by name.
+            for attr in ('type', 'simpleType'):
+                typename = getattr(obj, attr, None)
+                if (isinstance(typename, basestring) and
+                        typename in self._parser.SimpleTypeDict):
+                    items.append((attr, self._Signature(
+                        self._parser.SimpleTypeDict[typename])))
+        del self._active[key]
+        signature = hashlib.sha1(repr(
+            (obj.__class__.__name__, tuple(items)))).hexdigest()
+        if self._cycle >= depth:
+            self._cycle = sys.maxint
+            self._fingerprints[key] = signature
+        return signature
+
+    def _IdentifierReference(self, ident):
+        try:
+            fq_name = ident.getDefaultFQName()
+        except AmbiguousParentType:
+            fq_name = None
+        return ('IFMapIdentifier', ident.getName(), ident.getCppName(),
+                ident.getCIdentifierName(), fq_name)
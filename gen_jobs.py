@@ -0,0 +1,57 @@
+#
+# Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
+#
+
+"""
+Run independent code generation jobs, optionally on a pool of worker
+processes.
+
+A job is any callable that takes no arguments.  Jobs are not pickled:
+the job list is published in a module global before the pool forks and
+the workers only receive an index into it, so a job can be a bound
+method of a generator holding the whole schema model.
+
+Each job must write its own set of output files.  The generated output
+then does not depend on the number of workers or on the order in which
+the jobs complete.
+"""
+
+import multiprocessing
+
+_Jobs = []
+_InWorker = False
+
+# Wait for the pool results with a timeout; a blocking wait can not be
+# interrupted with Ctrl-C on python 2.
+_RESULT_TIMEOUT = 24 * 60 * 60
+
+
+def _RunJob(index):
+    global _InWorker
+    # Pool workers are daemonic and can not start a pool of their own;
+    # nested calls to RunJobs run serially inside the worker.
+    _InWorker = True
+    return _Jobs[index]()
+
+
+def RunJobs(jobs, nworkers=1):
+    """ Run the callables in jobs and return the list of their results,
+        in job order.  At most nworkers jobs run at the same time.
+    """
+    global _Jobs
+    if nworkers <= 1 or len(jobs) <= 1 or _InWorker:
+        return [job() for job in jobs]
+
+    _Jobs = jobs
+    pool = multiprocessing.Pool(min(nworkers, len(jobs)))
+    try:
+        result = pool.map_async(_RunJob, range(len(jobs)), chunksize=1)
+        results = result.get(_RESULT_TIMEOUT)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        _Jobs = []
+    return results
@@ -0,0 +1,179 @@
+#
+# Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
+#
+
+"""
+Timing report of a generateDS.py run (--profile-codegen).
+
+A run is divided in nested phases: loading the schema, preparing the
+generator models and generating each target, down to the methods of the
+individual backends.  A phase is identified by its path, for example
+"generate/ifmap-frontend/_generate_client_classes".  For every phase the
+report gives the number of times it ran, the time spent in it and the
+number and size of the files it generated.  The figures of a phase
+include those of the phases nested in it.
+
+Jobs started with CodegenProfile.RunJobs record their phases in the
+worker process and return them along with the job result.  The times of
+phases that ran in parallel workers are summed, so the nested phases of
+a parallel run may add up to more time than their parent.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import time
+from collections import OrderedDict
+
+from gen_jobs import RunJobs
+
+
+class CodegenProfile(object):
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._start = time.time()
+        self._stack = []
+        # path -> [calls, seconds, set of file names]
+        self._phases = OrderedDict()
+
+    def _Entry(self, path):
+        entry = self._phases.get(path)
+        if entry is None:
+            entry = [0, 0.0, set()]
+            self._phases[path] = entry
+        return entry
+
+    @contextlib.contextmanager
+    def Phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        self._stack.append(name)
+        entry = self._Entry('/'.join(self._stack))
+        start = time.time()
+        try:
+            yield
+        finally:
+            entry[0] += 1
+            entry[1] += time.time() - start
+            self._stack.pop()
+
+    @contextlib.contextmanager
+    def Instrument(self, obj, prefix):
+        """ Within the block, run each call of the methods of obj whose
+            name starts with prefix as a phase named after the method.
+        """
+        if not self.enabled:
+            yield
+            return
+        names = []
+        for name in dir(obj):
+            if not name.startswith(prefix) or name in vars(obj):
+                continue
+            method = getattr(obj, name)
+            if callable(method):
+                setattr(obj, name, self._Timed(name, method))
+                names.append(name)
+        try:
+            yield
+        finally:
+            # The timed methods refer to obj; generators rely on their
+            #   files being closed when they are released.
+            for name in names:
+                delattr(obj, name)
+
+    def _Timed(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            with self.Phase(name):
+                return method(*args, **kwargs)
+        return timed
+
+    def RecordFile(self, filename):
+        """ Count filename as generated by the current phase, and by the
+            phases it is nested in.
+        """
+        if not self.enabled:
+            return
+        for depth in range(1, len(self._stack) + 1):
+            self._Entry('/'.join(self._stack[:depth]))[2].add(filename)
+
+    def RunJobs(self, jobs, nworkers=1):
+        """ gen_jobs.RunJobs, keeping the phases recorded by the jobs.
+        """
+        if not self.enabled:
+            return RunJobs(jobs, nworkers)
+        results = RunJobs([functools.partial(self._RunJob, job)
+                           for job in jobs], nworkers)
+        for result, phases in results:
+            self._Merge(phases)
+        return [result for result, phases in results]
+
+    def _RunJob(self, job):
+        phases = self._phases
+        self._phases = OrderedDict()
+        try:
+            return job(), self._phases
+        finally:
+            self._phases = phases
+
+    def _Merge(self, phases):
+        for path, (calls, seconds, files) in phases.iteritems():
+            entry = self._Entry(path)
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2].update(files)
+
+    def _Results(self):
+        sizes = {}
+        def size(filename):
+            if filename not in sizes:
+                try:
+                    sizes[filename] = os.path.getsize(filename)
+                except OSError:
+                    sizes[filename] = 0
+            return sizes[filename]
+        results = []
+        files = set()
+        for path, (calls, seconds, phaseFiles) in self._phases.iteritems():
+            if '/' not in path:
+                files.update(phaseFiles)
+            results.append({
+                'phase': path,
+                'calls': calls,
+                'seconds': seconds,
+                'files': len(phaseFiles),
+                'bytes': sum(size(name) for name in phaseFiles),
+                })
+        total = {
+            'seconds': time.time() - self._start,
+            'files': len(files),
+            'bytes': sum(size(name) for name in files),
+            }
+        return results, total
+
+    def Report(self, outfile=None, jsonFilename=None):
+        """ Write the report as text to outfile and as JSON to
+            jsonFilename.
+        """
+        if not self.enabled:
+            return
+        results, total = self._Results()
+        if outfile is not None:
+            outfile.write('%10s %6s %6s %11s  %s\n' % (
+                'seconds', 'calls', 'files', 'bytes', 'phase'))
+            for result in results:
+                names = result['phase'].split('/')
+                outfile.write('%10.3f %6d %6d %11d  %s%s\n' % (
+                    result['seconds'], result['calls'], result['files'],
+                    result['bytes'], '  ' * (len(names) - 1), names[-1]))
+            outfile.write('%10.3f %6s %6d %11d  %s\n' % (
+                total['seconds'], '', total['files'], total['bytes'],
+                'total'))
+        if jsonFilename is not None:
+            outfile = open(jsonFilename, 'w')
+            json.dump({'phases': results, 'total': total}, outfile,
+                      indent=1, sort_keys=True)
+            outfile.write('\n')
+            outfile.close()
@@ -17,6 +17,76 @@ Options:
                              Default = 'xs:'.
     -b <behaviorfilename>    Input file name for behaviors added to subclasses
     -m                       Generate properties for member variables
+    -l, --generated-language=py|c++
+                             Language of the generated type classes.
+    -g, --generator-category=<category>[=<outprefix>][,...]
+                             Generator to run: type, service, ifmap-frontend,
+                             ifmap-backend, device-api, java-api, golang-api,
+                             contrail-json-schema or json-schema.  May be
+                             repeated, or given a comma separated list, to
+                             generate several targets from a single parse of
+                             the schema.  A target without "=<outprefix>"
+                             writes to the file name given with "-o".
+    -j, --jobs=N             Run up to N generator targets, and the
+                             independent files of the C++ backend, in
+                             parallel worker processes.  The generated
+                             files do not depend on N.  Use with -f.
+                             Default=1.
+    --model-cache-dir=<dir>  Cache the annotated schema model in <dir>.  The
+                             cache is keyed by the include-expanded schema
+                             and the options that affect parsing, so an
+                             unchanged schema is not parsed again.
+    --model-cache-size=<megabytes>
+                             Evict the least recently used models when the
+                             cache grows beyond this size.  Default=100.
+    --write-if-changed       Render the generated files in memory and leave
+                             files whose content did not change untouched,
+                             so that their modification time is preserved.
+    --changed-manifest=<file>
+                             Write the names of the files that were
+                             (re)written to <file>, one per line.  Implies
+                             --write-if-changed.
+    --incremental            java-api, golang-api and json-schema: record
+                             the model objects each file is generated from
+                             (in .generateDS-deps in the output directory)
+                             and only generate the files whose inputs
+                             changed since the previous run.
+    --use-slots              Generate the type classes of the python API
+                             with __slots__, to reduce the memory used by
+                             each instance.  exportDict then only exports
+                             the members defined in the schema.
+    --cached-hash            Generate type classes of the python API that
+                             cache their hash.  The generated setters,
+                             adders, inserters and deleters, of any
+                             object, clear the caches; objects used in
+                             sets or as dict keys must not be changed in
+                             other ways.
+    --buffered-export        Generate export_xml methods that collect the
+                             XML of an object and of the objects it
+                             contains in a list, and write it to the
+                             output file at once.
+    --lazy-xsd               Generate the type classes of the python API
+                             (<prefix>_xsd) as a package with one module
+                             per class, or per group of classes that refer
+                             to each other.  The package imports the
+                             module of a class on the first access to the
+                             class.  Not used for standalone parsers.
+    --parser-bench           type and ifmap-backend: also generate
+                             <prefix>_parser_bench.cc, a program timing
+                             the JSON parser of each type.
+    --fast-crc               type and ifmap-backend: compute the CRC of
+                             the generated C++ classes with a 64-bit
+                             non-cryptographic hash (autogen::Hash64)
+                             instead of boost::crc_32_type.  The
+                             CalculateCrc methods of the types then take
+                             an autogen::Hash64.
+    --profile-codegen        Report the time spent in each phase of the
+                             run (schema loading, model building and each
+                             generator backend) and the number and size
+                             of the files generated, on stderr.
+    --profile-codegen-json=<file>
+                             Write the --profile-codegen report to <file>
+                             as JSON.
     --subclass-suffix="XXX"  Append XXX to the generated subclass names.
                              Default="Sub".
     --root-element="XXX"     Assume XXX is root element of instance docs.
@@ -114,9 +184,14 @@ import logging
 import keyword
 import StringIO
 import textwrap
+import functools
+import weakref
 from cctype import TypeGenerator
 from ccmap import IFMapGenerator
 from ccsvc import ServiceGenerator
+from model_cache import ModelCache
+from gen_profile import CodegenProfile
+import idl_parser
 
 # Default logger configuration
 ## logging.basicConfig(level=logging.DEBUG,
@@ -139,6 +214,59 @@ from ccsvc import ServiceGenerator
 # Global variables etc.
 #
 
+#
+# Generator categories accepted by -g/--generator-category.  The IFMap
+#   categories share a single data model when several of them are
+#   requested in one invocation.
+IFMapCategories = (
+    'ifmap-frontend',
+    'ifmap-backend',
+    'device-api',
+    'java-api',
+    'golang-api',
+    'contrail-json-schema',
+    'json-schema',
+    )
+GeneratorCategories = ('type', 'service', ) + IFMapCategories
+
+
+class OutputFile(object):
+    """ Output file returned by makeFile in write-if-changed mode.
+
+    The content is rendered to memory.  When the file is closed (or
+    dropped, like the file objects that the generators never close) it
+    is handed to XsdParserGenerator.commitFile, which only rewrites the
+    file on disk when the content differs.
+    """
+    def __init__(self, parser_generator, name, content=''):
+        self.name = name
+        self.closed = False
+        self._PGenr = parser_generator
+        self._parts = []
+        if content:
+            self._parts.append(content)
+
+    def write(self, text):
+        self._parts.append(text)
+
+    def writelines(self, lines):
+        self._parts.extend(lines)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self._parts)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._PGenr.commitFile(self.name, self.getvalue())
+            self._parts = []
+
+    def __del__(self):
+        self.close()
+
 #
 # Do not modify the following VERSION comments.
 # Used by updateversion.py.
@@ -159,11 +287,30 @@ class XsdParserGenerator(object):
         self.PostponedExtensions = []
         self.ElementsForSubclasses = []
         self.ElementDict = {}
+        self.TypeIndex = {}
         self.Force = False
         self.NoQuestions = False
         self.Dirpath = []
         self.ExternalEncoding = sys.getdefaultencoding()
         self.genCategory = None
+        self.genTargets = []
+        self.Jobs = 1
+        self.WriteIfChanged = False
+        self.Incremental = False
+        self.UseSlots = False
+        self.BufferedExport = False
+        self.CachedHash = False
+        self.LazyXsd = False
+        self.ParserBench = False
+        self.FastCrc = False
+        self.ChangedManifest = None
+        self._OpenOutputFiles = weakref.WeakValueDictionary()
+        self.ModelCacheDir = None
+        self.ModelCacheSize = 100 * 1024 * 1024
+        self.Profile = CodegenProfile()
+        self.ProfileText = False
+        self.ProfileJson = None
+        self.IdlParser = None
         self.genLang = None
         self.LangGenr = None
         self.NamespacesDict = {}
@@ -662,7 +809,7 @@ if __name__ == '__main__':
         self.outputText = True
         self.args = sys.argv[1:]
         try:
-            options, self.args = getopt.getopt(self.args, 'l:g:hfyo:s:p:a:b:mu:q',
+            options, self.args = getopt.getopt(self.args, 'l:g:j:hfyo:s:p:a:b:mu:q',
                 ['help', 'subclass-suffix=',
                 'root-element=', 'super=',
                 'validator-bodies=', 'use-old-getter-setter',
@@ -670,7 +817,12 @@ if __name__ == '__main__':
                 'namespacedef=', 'external-encoding=',
                 'member-specs=', 'no-dates', 'no-versions',
                 'no-questions', 'session=', 'generator-category=',
-                'generated-language=', 'version',
+                'generated-language=', 'version', 'jobs=',
+                'model-cache-dir=', 'model-cache-size=',
+                'write-if-changed', 'changed-manifest=', 'incremental',
+                'profile-codegen', 'profile-codegen-json=', 'use-slots',
+                'buffered-export', 'cached-hash', 'lazy-xsd', 'parser-bench',
+                'fast-crc',
                 ])
         except getopt.GetoptError, exp:
             usage()
@@ -802,28 +954,89 @@ if __name__ == '__main__':
                 if self.genLang not in ('py', 'c++'):
                     raise RuntimeError('Option --generated-language must be "py" or "c++".')
             elif option[0] in ('-g', '--generator-category'):
-                self.genCategory = option[1]
-                if self.genCategory not in ('type',
-                                            'service',
-                                            'ifmap-frontend',
-                                            'ifmap-backend',
-                                            'device-api',
-                                            'java-api',
-                                            'golang-api',
-                                            'contrail-json-schema',
-                                            'json-schema'):
-                    raise RuntimeError('Option --generator-category must be "type", service", "ifmap-frontend", "ifmap-backend", "device-api", "java-api", "golang-api", "contrail-json-schema" or "json-schema".')
+                # -g may be repeated or given a comma separated list;
+                #   each target is "category" or "category=outprefix".
+                for target in option[1].split(','):
+                    genCategory, _, outFilename = target.partition('=')
+                    if genCategory not in GeneratorCategories:
+                        raise RuntimeError('Option --generator-category must be "type", service", "ifmap-frontend", "ifmap-backend", "device-api", "java-api", "golang-api", "contrail-json-schema" or "json-schema".')
+                    self.genTargets.append((genCategory, outFilename or None))
+                self.genCategory = self.genTargets[0][0]
+            elif option[0] in ('-j', '--jobs'):
+                try:
+                    self.Jobs = int(option[1])
+                except ValueError:
+                    self.Jobs = 0
+                if self.Jobs < 1:
+                    raise RuntimeError('Option --jobs must be a positive integer.')
+            elif option[0] == '--incremental':
+                self.Incremental = True
+            elif option[0] == '--use-slots':
+                self.UseSlots = True
+            elif option[0] == '--buffered-export':
+                self.BufferedExport = True
+            elif option[0] == '--cached-hash':
+                self.CachedHash = True
+            elif option[0] == '--lazy-xsd':
+                self.LazyXsd = True
+            elif option[0] == '--parser-bench':
+                self.ParserBench = True
+            elif option[0] == '--fast-crc':
+                self.FastCrc = True
+            elif option[0] == '--profile-codegen':
+                self.Profile.enabled = True
+                self.ProfileText = True
+            elif option[0] == '--profile-codegen-json':
+                self.Profile.enabled = True
+                self.ProfileJson = option[1]
+            elif option[0] == '--write-if-changed':
+                self.WriteIfChanged = True
+            elif option[0] == '--changed-manifest':
+                self.WriteIfChanged = True
+                self.ChangedManifest = option[1]
+            elif option[0] == '--model-cache-dir':
+                self.ModelCacheDir = option[1]
+            elif option[0] == '--model-cache-size':
+                try:
+                    self.ModelCacheSize = int(option[1]) * 1024 * 1024
+                except ValueError:
+                    self.ModelCacheSize = -1
+                if self.ModelCacheSize < 0:
+                    raise RuntimeError('Option --model-cache-size must be a number of megabytes.')
         if showVersion:
             print 'generateDS.py version %s' % VERSION
             sys.exit(0)
 
     def countChildren(self, element, count):
-        count += len(element.getChildren())
-        base = element.getBase()
-        if base and base in self.ElementDict:
-            parent = self.ElementDict[base]
-            count = self.countChildren(parent, count)
-        return count
+        return count + self.getTypeInfo(element).childCount
+
+    def getTypeInfo(self, element):
+        """ Return the XschemaTypeInfo of element.  The base chain of an
+            element is only resolved once; the bases it shares with other
+            elements are indexed along with it.
+        """
+        info = self.TypeIndex.get(id(element))
+        if info is not None:
+            return info
+        pending = []
+        while element is not None:
+            info = self.TypeIndex.get(id(element))
+            if info is not None:
+                break
+            if element in pending:
+                msg = ('Extension/restriction recursion detected.  ' +
+                      'Suggest you check definitions of types ' +
+                      '%s and %s.'
+                      )
+                msg = msg % (pending[-1].getName(), element.getName(), )
+                raise RuntimeError(msg)
+            pending.append(element)
+            base = element.getBase()
+            element = self.ElementDict.get(base) if base else None
+        for element in reversed(pending):
+            info = XschemaTypeInfo(element, info)
+            self.TypeIndex[id(element)] = info
+        return info
 
     def getParentName(self, element):
         base = element.getBase()
@@ -849,14 +1062,56 @@ if __name__ == '__main__':
             else:
                 reply = raw_input('File %s exists.  Overwrite? (y/n): ' % outFileName)
                 if reply == 'y':
-                    outFile = file(outFileName, 'w')
+                    outFile = self.openFile(outFileName, 'w')
         else:
             if (outAppend):
-                outFile = file(outFileName, 'a')
+                outFile = self.openFile(outFileName, 'a')
             else:
-                outFile = file(outFileName, 'w')
+                outFile = self.openFile(outFileName, 'w')
+        if outFile is not None:
+            self.Profile.RecordFile(outFileName)
+        return outFile
+
+    def openFile(self, outFileName, mode):
+        if not self.WriteIfChanged:
+            return file(outFileName, mode)
+        # Fail here, like file() would, if the file can not be written.
+        #   Opening for append does not modify an existing file.
+        file(outFileName, 'a').close()
+        content = ''
+        if mode == 'a':
+            content = file(outFileName, 'r').read()
+        outFile = OutputFile(self, outFileName, content)
+        self._OpenOutputFiles[id(outFile)] = outFile
         return outFile
 
+    def commitFile(self, outFileName, content):
+        """ Write content to outFileName unless the file already holds
+            exactly that content.  Returns True if the file was written.
+        """
+        if isinstance(content, unicode):
+            content = str(content)
+        if os.path.getsize(outFileName) == len(content):
+            infile = file(outFileName, 'rb')
+            unchanged = infile.read() == content
+            infile.close()
+            if unchanged:
+                return False
+        outfile = file(outFileName, 'w')
+        outfile.write(content)
+        outfile.close()
+        if self.ChangedManifest:
+            # Jobs may run in other processes; append whole lines and
+            #   sort the manifest once everything has been generated.
+            manifest = file(self.ChangedManifest, 'a')
+            manifest.write(outFileName + '\n')
+            manifest.close()
+        return True
+
+    def closeOutputFiles(self):
+        for outFile in self._OpenOutputFiles.values():
+            outFile.close()
+
     def mapName(self, oldName):
         newName = oldName
         if self.NameTable:
@@ -1081,19 +1336,23 @@ if __name__ == '__main__':
         TEMPLATE_SUBCLASS_FOOTER = fixSilence(TEMPLATE_SUBCLASS_FOOTER, silent)
         self._load_config()
 
-        if self.genCategory == 'type':
-            self._Generator = TypeGenerator(self)
-        elif self.genCategory == 'service':
-            self._Generator = ServiceGenerator(self)
-        elif (self.genCategory == 'ifmap-backend' or
-              self.genCategory == 'ifmap-frontend' or
-              self.genCategory == 'device-api' or
-              self.genCategory == 'java-api' or
-              self.genCategory == 'golang-api' or
-              self.genCategory == 'contrail-json-schema' or
-              self.genCategory == 'json-schema'):
-            self._Generator = IFMapGenerator(self, self.genCategory)
-        self._Generator.setLanguage(self.genLang)
+        # Every target shares the parsed tree; the IFMap categories also
+        #   share a single IFMapGenerator so that the IDL and the
+        #   identifier/metadata model are only built once.
+        self._Generators = []
+        ifmapGenerator = None
+        for genCategory, outFilename in self.genTargets:
+            if genCategory == 'type':
+                generator = TypeGenerator(self)
+            elif genCategory == 'service':
+                generator = ServiceGenerator(self)
+            else:
+                if ifmapGenerator is None:
+                    ifmapGenerator = IFMapGenerator(self, genCategory)
+                generator = ifmapGenerator
+            generator.setLanguage(self.genLang)
+            self._Generators.append(
+                (genCategory, outFilename or self.outFilename, generator))
 
     def _load_config(self):
         try:
@@ -1104,13 +1363,55 @@ if __name__ == '__main__':
         except ImportError, exp:
             pass
 
-    def parseAndGenerate(self):
-        #LG global DelayedElements, DelayedElements_subclass, AlreadyGenerated, SaxDelayedElements, \
-        #LG     AlreadyGenerated_subclass, UserMethodsPath, UserMethodsModule
+    def _modelCacheKey(self, schemaText):
+        # The generator sources are part of the key so that a changed
+        #   parser never loads a model annotated by an older one.
+        sources = []
+        for module in (sys.modules[__name__], idl_parser):
+            sourceFile = os.path.splitext(module.__file__)[0] + '.py'
+            sources.append(open(sourceFile, 'rb').read())
+        # Pickled classes are looked up by module name, which differs
+        #   between running generateDS.py as a script and importing it.
+        options = repr((VERSION, __name__, self.nameSpace,
+                        self.processIncludes, sorted(self.NameTable.items())))
+        return ModelCache.Key(schemaText, options, *sources)
+
+    def _getModelState(self, root):
+        return {
+            'root': root,
+            'ElementDict': self.ElementDict,
+            'SimpleTypeDict': self.SimpleTypeDict,
+            'SimpleElementDict': self.SimpleElementDict,
+            'AttributeGroups': self.AttributeGroups,
+            'ElementGroups': self.ElementGroups,
+            'SubstitutionGroups': self.SubstitutionGroups,
+            'NamespacesDict': self.NamespacesDict,
+            'XsdNameSpace': self.XsdNameSpace,
+            'CurrentNamespacePrefix': self.CurrentNamespacePrefix,
+            'IdlParser': self.IdlParser,
+            }
+
+    def _restoreModelState(self, state):
+        for name in ('ElementDict', 'SimpleTypeDict', 'SimpleElementDict',
+                     'AttributeGroups', 'ElementGroups', 'SubstitutionGroups',
+                     'NamespacesDict', 'XsdNameSpace', 'IdlParser'):
+            setattr(self, name, state[name])
+        self.TypeIndex = {}
+        self.set_type_constants(state['CurrentNamespacePrefix'])
+        return state['root']
+
+    def _resetGeneratedState(self):
         self.DelayedElements = []
         self.DelayedElements_subclass = []
         self.AlreadyGenerated = []
         self.AlreadyGenerated_subclass = []
+        self.PostponedExtensions = []
+        self.ElementsForSubclasses = []
+
+    def parseAndGenerate(self):
+        #LG global DelayedElements, DelayedElements_subclass, AlreadyGenerated, SaxDelayedElements, \
+        #LG     AlreadyGenerated_subclass, UserMethodsPath, UserMethodsModule
+        self._resetGeneratedState()
         if self.UserMethodsPath:
             # UserMethodsModule = __import__(UserMethodsPath)
             path_list = self.UserMethodsPath.split('.')
@@ -1123,26 +1424,96 @@ if __name__ == '__main__':
         dh = XschemaHandler(self)
     ##    parser.setDocumentHandler(dh)
         parser.setContentHandler(dh)
+        parser.setProperty(handler.property_lexical_handler, dh)
+        with self.Profile.Phase('load'):
+            root = self._loadSchema(parser, dh)
+        # The generators get the schema from root and the IDL parser;
+        #   the schema file has been consumed by the SAX parser.
+        infile = None
+        # Build the generator models before the targets are handed out
+        #   to the worker processes, so that they are built only once.
+        jobs = []
+        with self.Profile.Phase('prepare'):
+            for genCategory, outFilename, generator in self._Generators:
+                with self.Profile.Phase(genCategory):
+                    generator.prepare(root, infile)
+                jobs.append(functools.partial(self._generateTarget, root,
+                    infile, genCategory, outFilename, generator))
+        if self.ChangedManifest:
+            file(self.ChangedManifest, 'w').close()
+        with self.Profile.Phase('generate'):
+            self.Profile.RunJobs(jobs, self.Jobs)
+        if self.ChangedManifest:
+            infile = file(self.ChangedManifest, 'r')
+            changed = sorted(set(infile.read().splitlines()))
+            infile.close()
+            outfile = file(self.ChangedManifest, 'w')
+            outfile.writelines(name + '\n' for name in changed)
+            outfile.close()
+        if self.ProfileText:
+            self.Profile.Report(sys.stderr)
+        if self.ProfileJson:
+            self.Profile.Report(jsonFilename=self.ProfileJson)
+
+    def _loadSchema(self, parser, dh):
         if self.xschemaFileName == '-':
             infile = sys.stdin
         else:
             infile = open(self.xschemaFileName, 'r')
+        schemaTree = None
         if self.processIncludes:
+            # The schema is built from the lxml tree of the expanded
+            #   schema, without serializing and parsing it again.
             import process_includes
-            outfile = StringIO.StringIO()
-            process_includes.process_include_files(infile, outfile,
-                inpath=self.xschemaFileName)
-            outfile.seek(0)
-            infile = outfile
-        parser.parse(infile)
-        root = dh.getRoot()
-        root.annotate()
-    ##     print '-' * 60
-    ##     root.show(sys.stdout, 0)
-    ##     print '-' * 60
-        #debug_show_elements(root)
-        infile.seek(0)
-        self._Generator.generate(root, infile, self.outFilename)
+            with self.Profile.Phase('includes'):
+                schemaTree = process_includes.process_include_tree(infile,
+                    inpath=self.xschemaFileName)
+        modelCache = None
+        root = None
+        if self.ModelCacheDir:
+            with self.Profile.Phase('model-cache-load'):
+                if schemaTree is not None:
+                    from lxml import etree
+                    schemaText = etree.tostring(schemaTree)
+                else:
+                    schemaText = infile.read()
+                    infile = StringIO.StringIO(schemaText)
+                modelCache = ModelCache(self.ModelCacheDir,
+                                        self.ModelCacheSize)
+                modelKey = self._modelCacheKey(schemaText)
+                state = modelCache.Load(modelKey, self)
+                if state is not None:
+                    root = self._restoreModelState(state)
+        if root is None:
+            # The IDL comments are parsed by XschemaHandler.comment.
+            self.IdlParser = idl_parser.IDLParser()
+            with self.Profile.Phase('parse'):
+                if schemaTree is not None:
+                    replay_tree(schemaTree, dh)
+                else:
+                    parser.parse(infile)
+            root = dh.getRoot()
+            with self.Profile.Phase('annotate'):
+                root.annotate()
+        ##     print '-' * 60
+        ##     root.show(sys.stdout, 0)
+        ##     print '-' * 60
+            #debug_show_elements(root)
+            if modelCache:
+                with self.Profile.Phase('model-cache-store'):
+                    modelCache.Store(modelKey, self._getModelState(root),
+                                     self)
+        return root
+
+    def _generateTarget(self, root, infile, genCategory, outFilename,
+                        generator):
+        self.genCategory = genCategory
+        self.outFilename = outFilename
+        self._resetGeneratedState()
+        generator.setCategory(genCategory)
+        with self.Profile.Phase(genCategory):
+            generator.generate(root, infile, outFilename)
+            self.closeOutputFiles()
 
 #LG #
 #LG # For debugging.
@@ -1229,6 +1600,45 @@ class SimpleTypeElement(XschemaElementBase):
             return 0
 
 
+class XschemaTypeInfo(object):
+    """ What an element inherits through its extension/restriction chain.
+        The info of the base element is shared, so each element only adds
+        its own children to the counts and names of its base.
+    """
+    def __init__(self, element, base):
+        self.element = element
+        self.base = base
+        self.childCount = len(element.getChildren())
+        if base is not None:
+            self.childCount += base.childCount
+        self._elementNames = None
+
+    def getBases(self):
+        """ Iterate over the base elements, nearest first.
+        """
+        info = self.base
+        while info is not None:
+            yield info.element
+            info = info.base
+
+    def getElementNames(self):
+        """ Return the (cleaned up) names of the child elements, including
+            the ones inherited from the bases.
+        """
+        if self._elementNames is None:
+            if self.base is not None:
+                names = self.base.getElementNames()
+            else:
+                names = frozenset()
+            children = self.element.getChildren()
+            if children:
+                cleanupName = self.element._PGenr.cleanupName
+                names = names.union(cleanupName(child.cleanName)
+                                    for child in children)
+            self._elementNames = names
+        return self._elementNames
+
+
 class XschemaElement(XschemaElementBase):
     def __init__(self, parser_generator, attrs):
         XschemaElementBase.__init__(self)
@@ -1397,14 +1807,18 @@ class XschemaElement(XschemaElementBase):
 
     def annotate(self):
         # resolve group references within groups
-        for grp in self._PGenr.ElementGroups.values():
-            expandGroupReferences(grp)
+        groups = self._PGenr.ElementGroups
+        expanded = set()
+        for grp in groups.values():
+            expandGroupReferences(grp, groups, expanded)
         # Recursively expand group references
         visited = set()
-        self.expandGroupReferences_tree(visited)
+        self.expandGroupReferences_tree(visited, expanded)
         self.collect_element_dict()
         self.annotate_find_type()
         self.annotate_tree()
+        # The base names are final now (namespace prefixes stripped).
+        self._PGenr.TypeIndex = {}
         self.fix_dup_names()
         self.coerce_attr_types()
         self.checkMixedBases()
@@ -1418,13 +1832,13 @@ class XschemaElement(XschemaElementBase):
         for child in self.children:
             child.markExtendedTypes()
 
-    def expandGroupReferences_tree(self, visited):
+    def expandGroupReferences_tree(self, visited, expanded):
         if self.getName() in visited:
             return
         visited.add(self.getName())
-        expandGroupReferences(self)
+        expandGroupReferences(self, self._PGenr.ElementGroups, expanded)
         for child in self.children:
-            child.expandGroupReferences_tree(visited)
+            child.expandGroupReferences_tree(visited, expanded)
 
     def collect_element_dict(self):
         base = self.getBase()
@@ -1482,29 +1896,25 @@ class XschemaElement(XschemaElementBase):
     def hasMixedInChain(self):
         if self.isMixed():
             return True
-        base = self.getBase()
-        if base and base in self._PGenr.ElementDict:
-            parent = self._PGenr.ElementDict[base]
-            return parent.hasMixedInChain()
-        else:
-            return False
+        for parent in self._PGenr.getTypeInfo(self).getBases():
+            if parent.isMixed():
+                return True
+        return False
 
     def equalizeMixedBases(self):
         if not self.isMixed():
             self.setMixed(True)
-        base = self.getBase()
-        if base and base in self._PGenr.ElementDict:
-            parent = self._PGenr.ElementDict[base]
-            parent.equalizeMixedBases()
+        for parent in self._PGenr.getTypeInfo(self).getBases():
+            if not parent.isMixed():
+                parent.setMixed(True)
 
     def checkMixedBasesChain(self, child, childMixed):
-        base = self.getBase()
-        if base and base in self._PGenr.ElementDict:
-            parent = self._PGenr.ElementDict[base]
+        element = self
+        for parent in self._PGenr.getTypeInfo(self).getBases():
             if childMixed != parent.isMixed():
-                self.mixedExtensionError = 1
+                element.mixedExtensionError = 1
                 return
-            parent.checkMixedBasesChain(child, childMixed)
+            element = parent
 
     def resolve_type(self):
         self.complex = 0
@@ -1728,8 +2138,7 @@ class XschemaElement(XschemaElementBase):
         attrDefs = self.getAttributeDefs()
         # Collect a list of child element names.
         #   Must do this for base (extension) elements also.
-        elementNames = []
-        self.collectElementNames(elementNames, 0)
+        elementNames = self._PGenr.getTypeInfo(self).getElementNames()
         replaced = []
         # Create the needed new attributes.
         keys = attrDefs.keys()
@@ -1738,7 +2147,7 @@ class XschemaElement(XschemaElementBase):
             name = attr.getName()
             if name in elementNames:
                 newName = name + '_attr'
-                newAttr = XschemaAttribute(self_.PGenr, newName)
+                newAttr = XschemaAttribute(self._PGenr, newName)
                 attrDefs[newName] = newAttr
                 replaced.append(name)
         # Remove the old (replaced) attributes.
@@ -1747,22 +2156,6 @@ class XschemaElement(XschemaElementBase):
         for child in self.children:
             child.fix_dup_names()
 
-    def collectElementNames(self, elementNames, count):
-        for child in self.children:
-            elementNames.append(self._PGenr.cleanupName(child.cleanName))
-        base = self.getBase()
-        if base and base in self._PGenr.ElementDict:
-            parent = self._PGenr.ElementDict[base]
-            count += 1
-            if count > 100:
-                msg = ('Extension/restriction recursion detected.  ' +
-                      'Suggest you check definitions of types ' +
-                      '%s and %s.'
-                      )
-                msg = msg % (self.getName(), parent.getName(), )
-                raise RuntimeError(msg)
-            parent.collectElementNames(elementNames, count)
-
     def coerce_attr_types(self):
         replacements = []
         attrDefs = self.getAttributeDefs()
@@ -2347,6 +2740,126 @@ class XschemaHandler(handler.ContentHandler):
         elif self.inChoice:
             pass
 
+    #
+    # LexicalHandler methods: the IDL annotations are in XML comments.
+    #   They are passed to the IDL parser as the document is parsed.
+    def comment(self, content):
+        idlParser = self._PGenr.IdlParser
+        text = content.lstrip()
+        if idlParser is None or not text.startswith(idl_parser.IDL_MARKER):
+            return
+        lineno = self._locator.getLineNumber()
+        lineno += content.count('\n', 0, len(content) - len(text))
+        with self._PGenr.Profile.Phase('idl'):
+            idlParser.ParseStatements(text[len(idl_parser.IDL_MARKER):],
+                                      lineno)
+
+    def startCDATA(self):
+        pass
+
+    def endCDATA(self):
+        pass
+
+    def startDTD(self, name, publicId, systemId):
+        pass
+
+    def endDTD(self):
+        pass
+
+
+class TreeLocator(xml.sax.xmlreader.Locator):
+    """ SAX locator for the node being replayed by replay_tree. """
+    def __init__(self):
+        self.lineNumber = 1
+
+    def getLineNumber(self):
+        return self.lineNumber
+
+
+def replay_tree(doc, contentHandler):
+    """ Replay an lxml ElementTree as the SAX events expat would report
+        for its serialization, without the serialize/parse round trip.
+        Names are qualified names and namespace declarations are passed
+        as xmlns attributes, as expat does without namespace processing.
+        Comments go to the comment method of contentHandler; the locator
+        reports the line of the last comment.
+    """
+    from lxml import etree
+    Comment = etree.Comment
+    AttributesImpl = xml.sax.xmlreader.AttributesImpl
+    startElement = contentHandler.startElement
+    endElement = contentHandler.endElement
+    characters = contentHandler.characters
+    comment = contentHandler.comment
+    locator = TreeLocator()
+    contentHandler.setDocumentLocator(locator)
+    contentHandler.startDocument()
+    root = doc.getroot()
+    for node in reversed(list(root.itersiblings(preceding=True))):
+        if node.tag is Comment:
+            comment(unicode(node.text or ''))
+    names = {}
+    nsattrs = {}
+    depth = 0
+    for event, node in etree.iterwalk(root,
+            events=('start', 'end', 'start-ns', 'comment')):
+        if event == 'start':
+            attrs = nsattrs
+            nsattrs = {}
+            for key, value in node.items():
+                if key[0] == '{':
+                    key = replay_attribute_name(node, key)
+                attrs[unicode(key)] = unicode(value)
+            key = (node.tag, node.prefix)
+            name = names.get(key)
+            if name is None:
+                name = names[key] = replay_element_name(*key)
+            startElement(name, AttributesImpl(attrs))
+            depth += 1
+            text = node.text
+            if text:
+                characters(unicode(text))
+            continue
+        elif event == 'end':
+            endElement(names[(node.tag, node.prefix)])
+            depth -= 1
+        elif event == 'start-ns':
+            prefix, uri = node
+            if prefix:
+                nsattrs[u'xmlns:' + prefix] = unicode(uri)
+            else:
+                nsattrs[u'xmlns'] = unicode(uri)
+            continue
+        elif node.tag is Comment:
+            # Comments created by process_includes have no source line.
+            if node.sourceline is not None:
+                locator.lineNumber = node.sourceline
+            comment(unicode(node.text or ''))
+        text = node.tail
+        if text and depth:
+            characters(unicode(text))
+    for node in root.itersiblings():
+        if node.tag is Comment:
+            comment(unicode(node.text or ''))
+    contentHandler.endDocument()
+
+
+def replay_element_name(tag, prefix):
+    name = tag[tag.find('}') + 1:]
+    if prefix:
+        name = prefix + ':' + name
+    return unicode(name)
+
+
+def replay_attribute_name(node, key):
+    uri, name = key[1:].split('}', 1)
+    if uri == 'http://www.w3.org/XML/1998/namespace':
+        return 'xml:' + name
+    for prefix, value in node.nsmap.iteritems():
+        if prefix and value == uri:
+            return prefix + ':' + name
+    return name
+
 
 #
 # Code generation
@@ -5433,8 +5946,11 @@ def escape_string(instring):
 
 # Function that gets called recursively in order to expand nested references
 # to element groups
-def _expandGR(grp, visited):
-    # visited is used for loop detection
+def _expandGR(grp, groups, visited, expanded):
+    # visited is used for loop detection, expanded holds the groups that
+    #   no longer contain references
+    if id(grp) in expanded:
+        return
     children = []
     changed = False
     for child in grp.children:
@@ -5443,10 +5959,10 @@ def _expandGR(grp, visited):
             children.append(child)
             continue
         ref = groupRef.ref
-        referencedGroup = ElementGroups.get(ref, None)
+        referencedGroup = groups.get(ref, None)
         if referencedGroup is None:
             ref = strip_namespace(ref)
-            referencedGroup = ElementGroups.get(ref, None)
+            referencedGroup = groups.get(ref, None)
         if referencedGroup is None:
             #err_msg('*** Reference to unknown group %s' % groupRef.attrs['ref'])
             err_msg('*** Reference to unknown group %s\n' % groupRef.ref)
@@ -5457,15 +5973,16 @@ def _expandGR(grp, visited):
             err_msg('*** Circular reference for %s\n' % groupRef.ref)
             continue
         changed = True
-        _expandGR(referencedGroup, visited)
+        _expandGR(referencedGroup, groups, visited, expanded)
         children.extend(referencedGroup.children)
     if changed:
         # Avoid replacing the list with a copy of the list
         grp.children = children
+    expanded.add(id(grp))
 
-def expandGroupReferences(grp):
+def expandGroupReferences(grp, groups, expanded):
     visited = set()
-    _expandGR(grp, visited)
+    _expandGR(grp, groups, visited, expanded)
 
 def debug_show_elements(root):
     #print 'ElementDict:', ElementDict
@@ -8,6 +8,7 @@ import sys
 
 from ifmap_global import CamelCase, getGoLangType
 from ifmap_model import AmbiguousParentType
+from gen_deps import DependencyTracker
 
 
 class GoLangApiGenerator(object):
@@ -149,6 +150,20 @@ func (obj *%(typecamel)s) Add%(fieldcamel)s(value %(ptr)s%(fieldtype)s) {
 
     # end _GenerateCType
 
+    def _RegisterCType(self, ctype):
+        """ Mark ctype and the types _GenerateCType would emit inline as
+        generated, without generating them.
+        """
+        for deptype in ctype.getDependentTypes():
+            if deptype.getName() in self._top_level_map:
+                continue
+            self._RegisterCType(deptype)
+
+        ctypename = ctype.getName()
+        self._top_level_map[ctypename] = self._type_map[ctypename]
+
+    # end _RegisterCType
+
     def _ExamineInnerTypes(self, inner_type_map, top_level, ctype):
         """ Examine all the dependent types of a given top_level type
         (recursivly) in order to determine which types are referred to
@@ -241,14 +256,12 @@ type %(camel)s struct {
 """ % {"camel": ident.getCppName()}
         file.write(decl)
 
+        self._RegisterObjectTypes(ident)
+
         for prop in ident.getProperties():
             decl = '\t%s %s\n' % \
                    (prop.getCIdentifierName(), prop.getGoLangTypename())
             file.write(decl)
-            ctype = prop.getCType()
-            if ctype:
-                ctypename = ctype.getName()
-                self._top_level_map[ctypename] = self._type_map[ctypename]
 
         for link_info in ident.getLinksInfo():
             if ident.isLinkHas(link_info):
@@ -261,9 +274,6 @@ type %(camel)s struct {
                 decl = '\t%s_refs contrail.ReferenceList\n' % \
                        link_to.getCIdentifierName()
                 file.write(decl)
-                datatype = self._getAttrType(ident, link_info)
-                if datatype:
-                    self._top_level_map[datatype] = self._type_map[datatype]
 
         for back_link in ident.getBackLinksInfo():
             link_from = ident.getBackLinkFrom(back_link)
@@ -279,6 +289,25 @@ type %(camel)s struct {
         file.write(decl)
     # end _GenerateObjectStruct
 
+    def _RegisterObjectTypes(self, ident):
+        """ The property and link attribute types of an Identifier are
+        generated as top-level types.
+        """
+        for prop in ident.getProperties():
+            ctype = prop.getCType()
+            if ctype:
+                ctypename = ctype.getName()
+                self._top_level_map[ctypename] = self._type_map[ctypename]
+
+        for link_info in ident.getLinksInfo():
+            if ident.isLinkHas(link_info):
+                continue
+            datatype = self._getAttrType(ident, link_info)
+            if datatype:
+                self._top_level_map[datatype] = self._type_map[datatype]
+
+    # end _RegisterObjectTypes
+
     def _GenerateGenericMethods(self, ident, file):
         """ Methods that do not iterate through the Identifier's fields.
         """
@@ -823,16 +852,29 @@ func %(camel)sByUuid(c contrail.ApiClient, uuid string) (*%(camel)s, error) {
             print "-o option must specify directory"
             sys.exit(1)
 
-        self._GenerateTypeMap(dirname)
+        deps = DependencyTracker(self._parser, dirname, [__file__])
+        filename = os.path.join(dirname, 'types.go')
+        if not deps.IsCurrent(filename,
+                              [(ident.getName(), ident.getCppName())
+                               for ident in self._identifier_map.values()]):
+            self._GenerateTypeMap(dirname)
 
         for ident in self._identifier_map.values():
             filename = os.path.join(
                 dirname, ident.getCIdentifierName() + ".go")
-            self._GenerateObject(ident, filename)
+            if deps.IsCurrent(filename, ident):
+                self._RegisterObjectTypes(ident)
+            else:
+                self._GenerateObject(ident, filename)
 
         self._PromoteInnerTypes()
 
         for ctype in self._top_level_map.values():
             filename = os.path.join(
                 dirname, ctype.getCIdentifierName() + ".go")
-            self._GenerateStructType(ctype, filename)
+            # The types already in _top_level_map are not emitted inline.
+            if deps.IsCurrent(filename, ctype, sorted(self._top_level_map)):
+                self._RegisterCType(ctype)
+            else:
+                self._GenerateStructType(ctype, filename)
+        deps.Save()
@@ -6,12 +6,206 @@ Parse IDL statements embedded in a XML schema file.
 Copyright (c) 2013 Contrail Systems. All rights reserved.
 """
 
+import ast
 import logging
 import os
 import re
 import string
 import sys
 
+IDL_MARKER = '#IFMAP-SEMANTICS-IDL'
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>[ \t\r\f\v]+)
+  | (?P<newline>\n)
+  | (?P<string>[uUbB]?[rR]?(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"))
+  | (?P<number>[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?[lL]?)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>[()\[\],=;])
+""", re.VERBOSE | re.DOTALL)
+
+_CONSTANTS = {'True': True, 'False': False, 'None': None}
+
+
+class IDLParseError(Exception): pass
+
+
+def _Tokenize(text, lineno):
+    """ Yields (kind, value, lineno) for the IDL statements in text.
+        Newlines are dropped, also within string literals.
+    """
+    pos = 0
+    end = len(text)
+    while pos < end:
+        mch = _TOKEN_RE.match(text, pos)
+        if not mch:
+            raise IDLParseError('line %d: unexpected character %r' %
+                                (lineno, text[pos]))
+        pos = mch.end()
+        kind = mch.lastgroup
+        value = mch.group()
+        if kind == 'newline':
+            lineno += 1
+        elif kind == 'string':
+            yield kind, ast.literal_eval(value.replace('\n', '')), lineno
+            lineno += value.count('\n')
+        elif kind == 'number':
+            yield kind, ast.literal_eval(value), lineno
+        elif kind == 'name':
+            yield kind, str(value), lineno
+        elif kind != 'space':
+            yield kind, value, lineno
+    yield 'end', None, lineno
+
+
+class _StatementReader(object):
+    """ Recursive descent parser for a sequence of IDL statements:
+
+        statements := [statement] (';' [statement])*
+        statement  := NAME '(' [argument (',' argument)* [',']] ')'
+        argument   := [NAME '='] value
+        value      := STRING+ | NUMBER | True | False | None
+                    | '[' [value (',' value)* [',']] ']'
+                    | '(' [value (',' value)* [',']] ')'
+    """
+    def __init__(self, text, lineno):
+        self._tokens = _Tokenize(text, lineno)
+        self._Advance()
+
+    def _Advance(self):
+        self._kind, self._value, self._lineno = next(self._tokens)
+
+    def _Error(self, msg):
+        return IDLParseError('line %d: %s' % (self._lineno, msg))
+
+    def _Describe(self):
+        if self._kind == 'end':
+            return 'end of comment'
+        return repr(self._value)
+
+    def _Expect(self, op):
+        if self._kind != 'op' or self._value != op:
+            raise self._Error('expected %r, found %s' % (op, self._Describe()))
+        self._Advance()
+
+    def _IsOp(self, op):
+        return self._kind == 'op' and self._value == op
+
+    def Statements(self):
+        """ Yields (name, args, kwargs, lineno) for each statement. """
+        while self._kind != 'end':
+            if self._IsOp(';'):
+                self._Advance()
+                continue
+            yield self._Statement()
+            if self._kind != 'end':
+                self._Expect(';')
+
+    def _Statement(self):
+        if self._kind != 'name':
+            raise self._Error('expected statement, found %s' %
+                              self._Describe())
+        name, lineno = self._value, self._lineno
+        self._Advance()
+        self._Expect('(')
+        args = []
+        kwargs = {}
+        while not self._IsOp(')'):
+            if self._kind == 'name' and self._value not in _CONSTANTS:
+                keyword = self._value
+                self._Advance()
+                if not self._IsOp('='):
+                    raise self._Error('unknown name %s' % keyword)
+                self._Advance()
+                if keyword in kwargs:
+                    raise self._Error('%s: repeated keyword argument %s' %
+                                      (name, keyword))
+                kwargs[keyword] = self._Value()
+            elif kwargs:
+                raise self._Error('%s: non-keyword argument after keyword '
+                                  'argument' % name)
+            else:
+                args.append(self._Value())
+            if not self._IsOp(')'):
+                self._Expect(',')
+        self._Advance()
+        return name, args, kwargs, lineno
+
+    def _Value(self):
+        kind, value = self._kind, self._value
+        if kind == 'string':
+            self._Advance()
+            # Adjacent string literals are concatenated.
+            while self._kind == 'string':
+                value += self._value
+                self._Advance()
+            return value
+        if kind == 'number':
+            self._Advance()
+            return value
+        if kind == 'name':
+            if value not in _CONSTANTS:
+                raise self._Error('unknown name %s' % value)
+            self._Advance()
+            return _CONSTANTS[value]
+        if kind == 'op' and value in '[(':
+            close = ']' if value == '[' else ')'
+            self._Advance()
+            items = []
+            while not self._IsOp(close):
+                items.append(self._Value())
+                if not self._IsOp(close):
+                    self._Expect(',')
+            self._Advance()
+            if close == ')':
+                return tuple(items)
+            return items
+        raise self._Error('expected value, found %s' % self._Describe())
+
+
+def _IdlComments(infile):
+    """ Yields (lineno, text) for the text of each IDL comment in infile,
+        reading it one line at a time.
+    """
+    buf = ''
+    buf_lineno = 1
+    in_idl = False
+    lineno = 0
+    for line in infile:
+        lineno += 1
+        if not buf:
+            buf_lineno = lineno
+        buf += line
+        while True:
+            if in_idl:
+                end = buf.find('-->')
+                if end < 0:
+                    break
+                yield buf_lineno, buf[:end]
+                buf_lineno += buf.count('\n', 0, end + 3)
+                buf = buf[end + 3:]
+                in_idl = False
+                continue
+            start = buf.find('<!--')
+            if start < 0:
+                buf = ''
+                break
+            body = buf[start + 4:].lstrip()
+            if not body:
+                # The marker may follow on the next line.
+                buf_lineno += buf.count('\n', 0, start)
+                buf = buf[start:]
+                break
+            skip = len(buf) - len(body)
+            if body.startswith(IDL_MARKER):
+                skip += len(IDL_MARKER)
+                in_idl = True
+            buf_lineno += buf.count('\n', 0, skip)
+            buf = buf[skip:]
+    if in_idl:
+        raise IDLParseError('line %d: unterminated IDL comment' % buf_lineno)
+
+
 class IDLParser(object):
     class Property(object):
         def __init__(self, prop_name,
@@ -49,21 +243,38 @@ class IDLParser(object):
     def __init__(self):
         self._ElementDict = {}
 
+    # IDL statements and the methods that handle them.
+    _STATEMENTS = {
+        'Type': '_Type',
+        'Property': '_Property',
+        'ListProperty': '_ListProperty',
+        'MapProperty': '_MapProperty',
+        'Exclude': '_Exclude',
+        'Link': '_Link',
+    }
+
     def Parse(self, infile):
-        xml_comment = re.compile(r'<!--\s*#IFMAP-SEMANTICS-IDL(.*?)-->',
-                                 re.DOTALL)
-        file_matches = xml_comment.findall(infile.read())
-        # Remove newline, split at stmt boundary
-        matches = [re.sub('\n', '', match).split(';') for match in file_matches]
-        for statements in matches:
-            for stmt in statements:
-                # Oper in idl becomes method
-                try:
-                    eval("self._%s" %(stmt.lstrip()))
-                except TypeError:
-                    logger = logging.getLogger('idl_parser')
-                    logger.debug('ERROR statement: %s', stmt)
-                #self._ParseExpression(stmt)
+        """ Parse the IDL statements in the #IFMAP-SEMANTICS-IDL comments
+            of the schema read from infile.
+        """
+        for lineno, text in _IdlComments(infile):
+            self.ParseStatements(text, lineno)
+
+    def ParseStatements(self, text, lineno=1):
+        """ Parse the text of an IDL comment; lineno is the line on which
+            text starts and is used in error messages.
+        """
+        reader = _StatementReader(text, lineno)
+        for name, args, kwargs, lineno in reader.Statements():
+            try:
+                method = getattr(self, self._STATEMENTS[name])
+            except KeyError:
+                raise IDLParseError('line %d: unknown statement %s' %
+                                    (lineno, name))
+            try:
+                method(*args, **kwargs)
+            except TypeError, exp:
+                raise IDLParseError('line %d: %s: %s' % (lineno, name, exp))
 
     def Find(self, element):
         return self._ElementDict.get(element)
@@ -152,10 +363,15 @@ class IDLParser(object):
         idl_link = IDLParser.Link(link_name, *args, **kwargs)
         self._ElementDict[link_name] = (idl_link, from_name, to_name, attrs)
 
+# Module level names for the annotation classes, so that pickle can find
+# them when the parsed IDL is stored in the model cache.
+Property = IDLParser.Property
+Link = IDLParser.Link
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         sys.exit('Usage: %s schema.xsd' % sys.argv[0])
     if not os.path.exists(sys.argv[1]):
         sys.exit('Error: %s not found' % sys.argv[1])
     idl_parser = IDLParser()
-    idl_parser.Parse(sys.argv[1])
+    idl_parser.Parse(open(sys.argv[1]))
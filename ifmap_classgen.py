@@ -7,9 +7,21 @@ Generate the class definition corresponding to a given IFMap DB object.
 """
 
 from type_classgen import TypeClassGenerator, TypeImplGenerator
-from ifmap_global import CppTypeMap, GetModuleName
+from ifmap_global import CppTypeMap, GetModuleName, CRC32_TYPE, HASH64_TYPE, \
+    HASH64_DECL, DIFF_DECL, GenerateDiffCase
 from ifmap_model import IFMapIdentifier, IFMapProperty, IFMapLink, IFMapLinkAttr, MemberInfo, SimpleTypeWrapper
 
+def CrcChecksum(crcType):
+    """ The statement returning the checksum of crc, the crcType object of a
+        CalculateCrc method, as a boost::crc_32_type::value_type.
+    """
+    if crcType == CRC32_TYPE:
+        return 'return crc.checksum();\n'
+    return """%s::value_type checksum = crc.checksum();
+    return static_cast<boost::crc_32_type::value_type>(
+        checksum ^ (checksum >> 32));
+""" % crcType
+
 class IFMapGenBase(object):
     def __init__(self):
         pass
@@ -61,9 +73,10 @@ DBTable *DBTable_%(impl)s_%(class)s::CreateTable(DB *db, const string &name, DBG
         file.write(cdecl)
 
 class IFMapGenIdentifier(IFMapGenBase):
-    def __init__(self, TypeDict, identifier):
+    def __init__(self, TypeDict, identifier, crcType=CRC32_TYPE):
         self._TypeDict = TypeDict
         self._identifier = identifier
+        self._crcType = crcType
 
     def getName(self):
         return self._identifier.getCppName()
@@ -85,6 +98,7 @@ public:
     static bool Decode(const pugi::xml_node &parent, std::string *id_name,
                        %(class)s *ptr);
     virtual boost::crc_32_type::value_type CalculateCrc() const;
+    bool Diff(const %(class)s &rhs, boost::dynamic_bitset<> *changed) const;
 """ % {'class': self.getName() }
         file.write(public_methods)
 
@@ -112,6 +126,14 @@ public:
 
         file.write('\nprivate:\n')
         self._GenServerAttributes(file)
+        if len(self._identifier.getProperties()) > 0:
+            # The CRC of each property, computed on demand.
+            cdecl = """
+    %(crc)s::value_type PropertyCrc(PropertyId property) const;
+    mutable %(crc)s::value_type property_crc_[PROPERTY_ID_COUNT];
+    mutable std::bitset<PROPERTY_ID_COUNT> property_crc_valid_;
+""" % {'crc': self._crcType}
+            file.write(cdecl)
         footer = """
     DISALLOW_COPY_AND_ASSIGN(%s);
 };
@@ -168,6 +190,7 @@ public:
         self._GenToString(file)
         self._GenEmpty(file);
         self._GenProcessPropertyDiff(file)
+        self._GenDiff(file)
 
     def _GenConstructor(self, file):
         file.write('%s::%s() ' %
@@ -222,9 +245,10 @@ bool %s::SetProperty(const string &property, AutogenProperty *data) {
                            (membername, SimpleTypeWrapper(info)))
 
             cdecl = """
-        property_set_.set(%s);
+        property_set_.set(%(id)s);
+        property_crc_valid_.reset(%(id)s);
     }
-""" % prop.getPropertyId()
+""" % {'id': prop.getPropertyId()}
             file.write(cdecl)
 
         retval = """
@@ -245,10 +269,12 @@ void %s::ClearProperty(const string &property) {
         elsestmt = ''
         for prop in self._identifier.getProperties():
             cdecl = """
-    %sif (property == "%s") {
-        property_set_.reset(%s);
+    %(else)sif (property == "%(name)s") {
+        property_set_.reset(%(id)s);
+        property_crc_valid_.reset(%(id)s);
     }
-""" % (elsestmt, prop.getName(), prop.getPropertyId())
+""" % {'else': elsestmt, 'name': prop.getName(),
+       'id': prop.getPropertyId()}
             file.write(cdecl)
             elsestmt = 'else '
 
@@ -277,21 +303,22 @@ bool %s::empty() const {
     def _GenProcessPropertyDiff(self, file):
         if len(self._identifier.getProperties()) > 0:
             header = """
-boost::crc_32_type::value_type %s::CalculateCrc() const {
-""" % self.getName()
+%(crc)s::value_type %(class)s::PropertyCrc(PropertyId property) const {
+    %(crc)s crc;
+    switch (property) {
+""" % {'crc': self._crcType, 'class': self.getName()}
             file.write(header)
 
             indent_l0 = ' ' * 4
             indent_l1 = ' ' * 8
             indent_l11 = ' ' * 13
             indent_l2 = ' ' * 12
-            file.write(indent_l0 + 'boost::crc_32_type crc;\n')
             for prop in self._identifier.getProperties():
                 membername = prop.getPropertyName() + '_'
                 info = prop.getMemberInfo()
                 assert info
-                file.write(indent_l0 + 
-                           'if (IsPropertySet(%s)) {\n' % prop.getPropertyId())
+                file.write(indent_l0 +
+                           'case %s: {\n' % prop.getPropertyId())
                 if info.isSequence:
                     file.write(indent_l1 + 'for (%s::const_iterator iter = \n'
                                %(info.ctypename))
@@ -336,12 +363,34 @@ boost::crc_32_type::value_type %s::CalculateCrc() const {
                                    %(membername, membername));
                     else:
                         assert()
-                file.write(indent_l0 + '} \n')
+                file.write(indent_l1 + 'break;\n')
+                file.write(indent_l0 + '}\n')
+
+            footer = """    default:
+        break;
+    }
+    return crc.checksum();
+}
 
-            file.write(indent_l0 + 'return crc.checksum();\n');
+boost::crc_32_type::value_type %(class)s::CalculateCrc() const {
+    %(crc)s crc;
+    for (int i = 0; i < PROPERTY_ID_COUNT; ++i) {
+        PropertyId property = static_cast<PropertyId>(i);
+        if (!IsPropertySet(property)) {
+            continue;
+        }
+        if (!property_crc_valid_.test(property)) {
+            property_crc_[property] = PropertyCrc(property);
+            property_crc_valid_.set(property);
+        }
+        crc.process_bytes(&property_crc_[property],
+                          sizeof(property_crc_[property]));
+    }
+    %(return)s}
 
-            retval = "}\n\n"
-            file.write(retval)
+""" % {'crc': self._crcType, 'class': self.getName(),
+       'return': CrcChecksum(self._crcType)}
+            file.write(footer)
         else:
             function = """
 boost::crc_32_type::value_type %s::CalculateCrc() const {
@@ -350,10 +399,51 @@ boost::crc_32_type::value_type %s::CalculateCrc() const {
 """ % self.getName()
             file.write(function)
 
+    def _GenDiff(self, file):
+        """ Generate the method Diff, which sets the bits of changed
+            indexed by the PropertyId of the properties that differ from
+            those of rhs.  With a NULL changed, it returns at the first
+            difference.
+        """
+        cdecl = """bool %s::Diff(const %s &rhs, boost::dynamic_bitset<> *changed) const {
+""" % (self.getName(), self.getName())
+        file.write(cdecl)
+        properties = self._identifier.getProperties()
+        if len(properties) == 0:
+            file.write('    if (changed != NULL) changed->clear();\n')
+            file.write('    return false;\n}\n\n')
+            return
+        cdecl = """    if (changed != NULL) {
+        changed->clear();
+        changed->resize(PROPERTY_ID_COUNT);
+    }
+"""
+        file.write(cdecl)
+        for prop in properties:
+            membername = prop.getPropertyName() + '_'
+            info = prop.getMemberInfo()
+            if info.isSequence:
+                simple = not info.xsd_object.isComplex()
+            else:
+                simple = not info.isComplex
+            if simple:
+                test = '%s != rhs.%s' % (membername, membername)
+            elif info.isSequence:
+                test = 'DiffSequence(%s, rhs.%s)' % (membername, membername)
+            else:
+                test = '%s.Diff(rhs.%s, NULL)' % (membername, membername)
+            test = ('IsPropertySet(%(id)s) != rhs.IsPropertySet(%(id)s) ||\n'
+                    '        (IsPropertySet(%(id)s) && %(test)s)') % {
+                'id': prop.getPropertyId(), 'test': test}
+            GenerateDiffCase(file, ' ' * 4, test, prop.getPropertyId())
+        file.write('    return changed != NULL && changed->any();\n')
+        file.write('}\n\n')
+
 class IFMapGenLinkAttr(IFMapGenBase):
-    def __init__(self, TypeDict, meta):
+    def __init__(self, TypeDict, meta, crcType=CRC32_TYPE):
         self._TypeDict = TypeDict
         self._meta = meta
+        self._crcType = crcType
 
     def getName(self):
         return self._meta.getCppName()
@@ -470,11 +560,10 @@ boost::crc_32_type::value_type %s::CalculateCrc() const { """ % self.getName()
         ctypename = self._meta.getCTypename()
         if self._meta.getCType():
             cdecl = """
-    boost::crc_32_type crc;
+    %s crc;
     data_.CalculateCrc(&crc);
-    return crc.checksum();
-}
-"""
+    %s}
+""" % (self._crcType, CrcChecksum(self._crcType))
         else:
             cdecl = """
 }
@@ -482,10 +571,11 @@ boost::crc_32_type::value_type %s::CalculateCrc() const { """ % self.getName()
         file.write(cdecl)
 
 class IFMapClassGenerator(object):
-    def __init__(self, cTypeDict):
+    def __init__(self, cTypeDict, crcType=CRC32_TYPE):
         self._cTypeDict = cTypeDict
+        self._crcType = crcType
         self._generated_types = { }
-        self._TypeGenerator = TypeClassGenerator(cTypeDict)
+        self._TypeGenerator = TypeClassGenerator(cTypeDict, crcType)
         self._generated_props = { }
 
     def _GenerateProperty(self, file, prop):
@@ -518,6 +608,7 @@ class %(class)s {
 // autogenerated file --- DO NOT EDIT ---
 #ifndef __SCHEMA__%(modname)s_TYPES_H__
 #define __SCHEMA__%(modname)s_TYPES_H__
+#include <bitset>
 #include <map>
 #include <set>
 #include <vector>
@@ -538,11 +629,12 @@ class DB;
 class DBGraph;
 class IFMapServerParser;
 class IFMapAgentParser;
-
-namespace autogen {
-
 """ % {'modname': module_name.upper()}
         file.write(header)
+        if self._crcType == HASH64_TYPE:
+            file.write(HASH64_DECL)
+        file.write(DIFF_DECL)
+        file.write('\nnamespace autogen {\n\n')
         for idn in IdentifierDict.values():
             # generate all dependent types
             properties = idn.getProperties()
@@ -562,12 +654,13 @@ namespace autogen {
             if not idn._xelement:
                 # cross-ref'd id from another file
                 continue
-            generator = IFMapGenIdentifier(self._cTypeDict, idn)
+            generator = IFMapGenIdentifier(self._cTypeDict, idn,
+                                           self._crcType)
             generator.ServerClassDefn(file)
 
         for meta in MetaDict.values():
             if type(meta) is IFMapLinkAttr:
-                generator = IFMapGenLinkAttr(self, meta)
+                generator = IFMapGenLinkAttr(self, meta, self._crcType)
                 generator.ServerClassDefn(file)
 
         file.write('}  // namespace autogen\n')
@@ -608,9 +701,10 @@ namespace autogen {
                    module_name.upper())
 
 class IFMapImplGenerator(object):
-    def __init__(self, cTypeDict):
+    def __init__(self, cTypeDict, crcType=CRC32_TYPE):
         self._cTypeDict = cTypeDict
-        self._TypeImplGenerator = TypeImplGenerator(None)
+        self._crcType = crcType
+        self._TypeImplGenerator = TypeImplGenerator(None, crcType)
         self._DBTableList = []
         self._module_name = ''
 
@@ -632,25 +726,39 @@ namespace autogen {
         for ctype in self._cTypeDict.values():
             self._TypeImplGenerator.GenerateType(file, ctype)
 
-        self._module_name = GetModuleName(file, '_types.cc')
-
         for idn in IdentifierDict.values():
             if not idn._xelement:
                 # cross-ref'd id from another file
                 continue
-            generator = IFMapGenIdentifier(self._cTypeDict, idn)
+            generator = IFMapGenIdentifier(self._cTypeDict, idn,
+                                           self._crcType)
             generator.ServerClassImpl(file)
+
+        for meta in MetaDict.values():
+            if type(meta) is IFMapLinkAttr:
+                generator = IFMapGenLinkAttr(self, meta, self._crcType)
+                generator.ServerClassImpl(file)
+
+        file.write('}  // namespace autogen\n')
+        # end
+
+    def _BuildTableList(self, IdentifierDict, MetaDict):
+        """ Build the list of DB tables created by the ModuleInit functions.
+            This does not depend on the _types.cc file so that each
+            component file can be generated on its own.
+        """
+        self._DBTableList = []
+        for idn in IdentifierDict.values():
+            if not idn._xelement:
+                # cross-ref'd id from another file
+                continue
             tbl = (idn.getCIdentifierName(), idn.getCppName())
             self._DBTableList.append(tbl)
 
         for meta in MetaDict.values():
             if type(meta) is IFMapLinkAttr:
-                generator = IFMapGenLinkAttr(self, meta)
-                generator.ServerClassImpl(file)
                 tbl = (meta.getCIdentifierName(), meta.getCppName())
                 self._DBTableList.append(tbl)
-
-        file.write('}  // namespace autogen\n')
         # end
 
     def _GenerateGraphFilter(self, file, hdrname, component, IdentifierDict,
@@ -716,6 +824,8 @@ void %(module)s_%(comp)s_GenerateObjectTypeList(std::set<std::string> *object_ty
 
     def _GenerateComponent(self, file, hdrname, component,
                            IdentifierDict, MetaDict):
+        self._module_name = GetModuleName(file, '_%s.cc' % component.lower())
+        self._BuildTableList(IdentifierDict, MetaDict)
         header = """
 // autogenerated file --- DO NOT EDIT ---
 #include "%(hdrname)s"
@@ -805,6 +805,12 @@ class IFMapApiGenerator(object):
         write(gen_file, "except ImportError:")
         write(gen_file, "    from vnc_api.exceptions import NoIdError")
         write(gen_file, "")
+        write(gen_file, "")
+        write(gen_file, "def decode_list(cls):")
+        write(gen_file, '    """Return the decoder of a list of dicts of cls objects."""')
+        write(gen_file, "    return lambda elems: [cls(**elem) for elem in elems]")
+        write(gen_file, "# end decode_list")
+        write(gen_file, "")
 
         write(gen_file, "")
         for ident in self._non_exclude_idents():
@@ -889,7 +895,7 @@ class IFMapApiGenerator(object):
                         write(gen_file, "                        vnc_api.gen.%s_xsd.%s(**elem))" \
                                                                  %(gen_filename_pfx, xsd_type))
                     else:
-                        write(gen_file, "                props_dict['%s'] = vnc_api.gen.%s_xsd.%s(params_dict=kwargs[u'%s'])" \
+                        write(gen_file, "                props_dict['%s'] = vnc_api.gen.%s_xsd.%s.from_params(kwargs[u'%s'])" \
                                                                  %(prop_name, gen_filename_pfx, xsd_type, prop_name))
                 else:
                     write(gen_file, "            props_dict['%s'] = kwargs[u'%s']" %(prop_name, prop_name))
@@ -934,7 +940,7 @@ class IFMapApiGenerator(object):
                 write(gen_file, "            obj.%s_refs = kwargs[u'%s_refs']" %(to_name, to_name))
                 if link_type: # link with attributes
                     write(gen_file, "            for ref in obj.%s_refs:" %(to_name))
-                    write(gen_file, "                ref['attr'] = vnc_api.gen.%s_xsd.%s(params_dict=ref[u'attr'])" %(gen_filename_pfx, link_type))
+                    write(gen_file, "                ref['attr'] = vnc_api.gen.%s_xsd.%s.from_params(ref[u'attr'])" %(gen_filename_pfx, link_type))
                 write(gen_file, "        except KeyError:")
                 write(gen_file, "            pass")
 
@@ -957,6 +963,8 @@ class IFMapApiGenerator(object):
             write(gen_file, "        return obj")
             write(gen_file, "    # end from_dict")
             write(gen_file, "")
+            self._generate_client_from_dict_list(gen_file, ident,
+                                                 gen_filename_pfx)
 
             # Setters for common fields
             write(gen_file, "    @vnc_api.gen.%s_common.%s.uuid.setter" %(gen_filename_pfx, class_name))
@@ -1183,6 +1191,144 @@ class IFMapApiGenerator(object):
             write(gen_file, "")
     # end _generate_client_classes
 
+    def _generate_client_from_dict_list(self, gen_file, ident,
+                                        gen_filename_pfx):
+        # from_dict for a list of dicts: the decoders are looked up once
+        #   for the list, and the absent fields cost a dict lookup instead
+        #   of a KeyError.  The fields are looked up with the unicode keys
+        #   of the decoded JSON, and set with str names.
+        simple_props = []
+        complex_props = []
+        for prop in ident.getProperties():
+            prop_name = prop.getName().replace('-', '_')
+            complex_type = prop.getCType()
+            xsd_type = prop.getXsdType()
+            if not (complex_type and xsd_type):
+                simple_props.append(prop_name)
+            else:
+                is_list = ((prop.isList() and not prop.isListUsingWrapper()) or
+                           (prop.isMap() and not prop.isMapUsingWrapper()))
+                complex_props.append((prop_name, xsd_type, is_list))
+        fields = ['parent_uuid']
+        for child_ident in ident.getChildren():
+            fields.append('%ss' % child_ident.getName().replace('-', '_'))
+        attr_refs = []
+        for link_info in ident.getLinksInfo():
+            if not ident.isLinkRef(link_info):
+                continue
+            link_type = ident.getLink(link_info).getXsdType()
+            to_name = ident.getLinkTo(link_info).getName().replace('-', '_')
+            if link_type:
+                attr_refs.append(('%s_refs' % to_name,
+                                  'xsd.%s.from_params' % link_type))
+            else:
+                fields.append('%s_refs' % to_name)
+        for back_link_info in ident.getBackLinksInfo():
+            if not ident.isLinkRef(back_link_info):
+                continue
+            from_name = ident.getBackLinkFrom(back_link_info).getName()
+            fields.append('%s_back_refs' % from_name.replace('-', '_'))
+
+        write(gen_file, "    @classmethod")
+        write(gen_file, "    def from_dict_list(cls, dicts, lazy=False):")
+        write(gen_file, '        """Decode dicts, a list of dicts as taken by from_dict.')
+        write(gen_file, '        ')
+        write(gen_file, '        With lazy, the complex properties are only decoded on their')
+        write(gen_file, '        first access.')
+        write(gen_file, '        ')
+        write(gen_file, '        :returns: list of objects')
+        write(gen_file, '        ')
+        write(gen_file, '        """')
+        write(gen_file, "        xsd = vnc_api.gen.%s_xsd" % (gen_filename_pfx))
+        write(gen_file, "        simple_props = (")
+        for prop_name in simple_props:
+            write(gen_file, "            (u'%s', '%s')," % (prop_name, prop_name))
+        write(gen_file, "            )")
+        write(gen_file, "        complex_props = (")
+        for prop_name, xsd_type, is_list in complex_props:
+            if is_list:
+                decoder = 'decode_list(xsd.%s)' % xsd_type
+            else:
+                decoder = 'xsd.%s.from_params' % xsd_type
+            write(gen_file, "            (u'%s', '%s', %s)," % (prop_name, prop_name,
+                                                      decoder))
+        write(gen_file, "            )")
+        write(gen_file, "        fields = (")
+        for field in fields:
+            write(gen_file, "            (u'%s', '%s')," % (field, field))
+        write(gen_file, "            )")
+        write(gen_file, "        attr_refs = (")
+        for field, decoder in attr_refs:
+            write(gen_file, "            (u'%s', '%s', %s)," % (field, field, decoder))
+        write(gen_file, "            )")
+        write(gen_file, "        objs = []")
+        write(gen_file, "        for kwargs in dicts:")
+        write(gen_file, "            props_dict = {}")
+        write(gen_file, "            for key, prop in simple_props:")
+        write(gen_file, "                if key in kwargs:")
+        write(gen_file, "                    props_dict[prop] = kwargs[key]")
+        write(gen_file, "            deferred = {}")
+        write(gen_file, "            for key, prop, decode in complex_props:")
+        write(gen_file, "                if key in kwargs:")
+        write(gen_file, "                    value = kwargs[key]")
+        write(gen_file, "                    if value is None:")
+        write(gen_file, "                        props_dict[prop] = None")
+        write(gen_file, "                    elif lazy:")
+        write(gen_file, "                        # Still passed, to be a pending update")
+        write(gen_file, "                        props_dict[prop] = None")
+        write(gen_file, "                        deferred['_' + prop] = value")
+        write(gen_file, "                    else:")
+        write(gen_file, "                        props_dict[prop] = decode(value)")
+        write(gen_file, "            fq_name = kwargs[u'fq_name']")
+        write(gen_file, "            props_dict.update({'parent_type': kwargs.get(u'parent_type', None),")
+        write(gen_file, "                               'fq_name': fq_name})")
+        write(gen_file, "            obj = cls(fq_name[-1], **props_dict)")
+        write(gen_file, "            if deferred:")
+        write(gen_file, "                obj._deferred_props = deferred")
+        write(gen_file, "            obj.uuid = kwargs[u'uuid']")
+        write(gen_file, "            for key, field in fields:")
+        write(gen_file, "                if key in kwargs:")
+        write(gen_file, "                    setattr(obj, field, kwargs[key])")
+        write(gen_file, "            for key, field, decode in attr_refs:")
+        write(gen_file, "                if key in kwargs:")
+        write(gen_file, "                    refs = kwargs[key]")
+        write(gen_file, "                    setattr(obj, field, refs)")
+        write(gen_file, "                    for ref in refs:")
+        write(gen_file, "                        ref['attr'] = decode(ref[u'attr'])")
+        write(gen_file, "            objs.append(obj)")
+        write(gen_file, "        return objs")
+        write(gen_file, "    # end from_dict_list")
+        write(gen_file, "")
+        if not complex_props:
+            return
+        # The deferred values are the decoded JSON, and the decoders are
+        #   looked up by name on their first access, so that the objects
+        #   can still be pickled.
+        write(gen_file, "    # The xsd types of the complex properties, and whether they are")
+        write(gen_file, "    # lists, to decode those deferred by from_dict_list.")
+        write(gen_file, "    _deferred_prop_types = {")
+        for prop_name, xsd_type, is_list in complex_props:
+            write(gen_file, "        '_%s': ('%s', %s)," % (prop_name, xsd_type, is_list))
+        write(gen_file, "        }")
+        write(gen_file, "")
+        write(gen_file, "    def __getattr__(self, name):")
+        write(gen_file, "        # Decode a property deferred by from_dict_list on its first access.")
+        write(gen_file, "        deferred = self.__dict__.get('_deferred_props')")
+        write(gen_file, "        if not deferred or name not in deferred:")
+        write(gen_file, "            raise AttributeError(name)")
+        write(gen_file, "        xsd_type, is_list = self._deferred_prop_types[name]")
+        write(gen_file, "        cls = getattr(vnc_api.gen.%s_xsd, xsd_type)" % (gen_filename_pfx))
+        write(gen_file, "        value = deferred.pop(name)")
+        write(gen_file, "        if is_list:")
+        write(gen_file, "            value = decode_list(cls)(value)")
+        write(gen_file, "        else:")
+        write(gen_file, "            value = cls.from_params(value)")
+        write(gen_file, "        self.__dict__[name] = value")
+        write(gen_file, "        return value")
+        write(gen_file, "    # end __getattr__")
+        write(gen_file, "")
+    # end _generate_client_from_dict_list
+
     def _create_heat_template_params(self, prop_list):
         # print parameters
         for key,val in enumerate(prop_list):
@@ -65,9 +65,155 @@ def CamelCase(input):
         name += w.capitalize()
     return name
 
+# The classes computing the CRC of the generated C++ classes: boost CRC-32,
+#   or with --fast-crc a 64-bit hash declared in the generated headers.
+CRC32_TYPE = 'boost::crc_32_type'
+HASH64_TYPE = 'autogen::Hash64'
+
+HASH64_DECL = """
+#ifndef __AUTOGEN_HASH64__
+#define __AUTOGEN_HASH64__
+#include <stdint.h>
+#include <string.h>
+
+namespace autogen {
+// Non-cryptographic 64-bit hash with the interface of boost::crc_32_type,
+// mixing 8 bytes per step.  The length of each buffer is hashed too.
+class Hash64 {
+public:
+    typedef uint64_t value_type;
+    Hash64() : hash_(0x9e3779b97f4a7c15ULL) { }
+    void process_bytes(const void *buffer, size_t size) {
+        const unsigned char *data = static_cast<const unsigned char *>(buffer);
+        const value_type length = size;
+        value_type word;
+        for (; size >= sizeof(word); data += sizeof(word), size -= sizeof(word)) {
+            memcpy(&word, data, sizeof(word));
+            Mix(word);
+        }
+        word = 0;
+        memcpy(&word, data, size);
+        Mix(word);
+        Mix(length);
+    }
+    value_type checksum() const {
+        value_type hash = hash_;
+        hash ^= hash >> 33;
+        hash *= 0xff51afd7ed558ccdULL;
+        hash ^= hash >> 33;
+        hash *= 0xc4ceb9fe1a85ec53ULL;
+        hash ^= hash >> 33;
+        return hash;
+    }
+private:
+    void Mix(value_type word) {
+        word *= 0x87c37b91114253d5ULL;
+        hash_ ^= (word << 31) | (word >> 33);
+        hash_ = ((hash_ << 27) | (hash_ >> 37)) * 5 + 0x52dce729;
+    }
+    value_type hash_;
+};
+}  // namespace autogen
+#endif  // __AUTOGEN_HASH64__
+"""
+
+# Declared in the generated _types.h headers, for the Diff methods.
+DIFF_DECL = """
+#ifndef __AUTOGEN_DIFF_SEQUENCE__
+#define __AUTOGEN_DIFF_SEQUENCE__
+namespace autogen {
+// Whether the vectors of generated types lhs and rhs differ.
+template <typename T>
+inline bool DiffSequence(const std::vector<T> &lhs,
+                         const std::vector<T> &rhs) {
+    if (lhs.size() != rhs.size()) {
+        return true;
+    }
+    for (size_t i = 0; i < lhs.size(); ++i) {
+        if (lhs[i].Diff(rhs[i], NULL)) {
+            return true;
+        }
+    }
+    return false;
+}
+}  // namespace autogen
+#endif  // __AUTOGEN_DIFF_SEQUENCE__
+"""
+
+def GenerateDiffCase(file, indent, test, memberId):
+    """ Write the C++ code of a Diff method recording memberId as changed
+        when the expression test is true.
+    """
+    file.write(indent + 'if (%s) {\n' % test)
+    file.write(indent + '    if (changed == NULL) return true;\n')
+    file.write(indent + '    changed->set(%s);\n' % memberId)
+    file.write(indent + '}\n')
+
 def GetModuleName(file, suffix):
     filename = os.path.basename(file.name)
     mod_name = filename[:filename.find(suffix)]
     mod_name = mod_name.replace('-', '_')
     mod_name = mod_name.replace('.', '_')
     return mod_name
+
+def GenerateTagDispatch(file, indent, tag, length, cases):
+    """ Write the C++ code running the code of the case named after the
+        null terminated string tag, whose length is length.  cases is a
+        list of (name, code) pairs, the code of each case being indented
+        for a block opened at indent.  The cases are selected by a switch
+        on the length of the name, then on its characters, so that tag is
+        compared to a single name, with memcmp once its length is known.
+        The code of cases with the same name is run in order.
+    """
+    names = []
+    codes = {}
+    for name, code in cases:
+        if name not in codes:
+            names.append(name)
+            codes[name] = ''
+        codes[name] += code
+
+    def write_code(code, depth):
+        prefix = ' ' * (4 * depth)
+        for line in code.splitlines():
+            file.write((prefix + line if line.strip() else line) + '\n')
+
+    def write_case(names, depth, switched, sized):
+        pad = indent + ' ' * (4 * depth)
+        if len(names) == 1:
+            if sized:
+                file.write(pad + 'if (memcmp(%s, "%s", %d) == 0) {\n' % (
+                    tag, names[0], len(names[0])))
+            else:
+                file.write(pad + 'if (strcmp(%s, "%s") == 0) {\n' % (
+                    tag, names[0]))
+            write_code(codes[names[0]], depth)
+            file.write(pad + '}\n')
+            return
+        if not sized:
+            # Also when the names have the same length: the characters of
+            #   tag are only read within its length.
+            lengths = sorted(set(len(name) for name in names))
+            file.write(pad + 'switch (%s) {\n' % length)
+            groups = [(str(size), [name for name in names if len(name) == size])
+                      for size in lengths]
+            sized = True
+        else:
+            # The position telling most names apart.
+            position = max(
+                (i for i in range(len(names[0])) if i not in switched),
+                key=lambda i: len(set(name[i] for name in names)))
+            switched = switched | set([position])
+            file.write(pad + 'switch (%s[%d]) {\n' % (tag, position))
+            chars = sorted(set(name[position] for name in names))
+            groups = [("'%s'" % char.replace('\\', '\\\\').replace("'", "\\'"),
+                       [name for name in names if name[position] == char])
+                      for char in chars]
+        for label, group in groups:
+            file.write(pad + 'case %s:\n' % label)
+            write_case(group, depth + 1, switched, sized)
+            file.write(pad + '    break;\n')
+        file.write(pad + '}\n')
+
+    if names:
+        write_case(names, 0, frozenset(), False)
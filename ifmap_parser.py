@@ -14,7 +14,9 @@ There are 3 scenarios:
   - Link meta with content: creates an object;
 """
 
-from ifmap_global import GetModuleName
+import StringIO
+
+from ifmap_global import GenerateTagDispatch, GetModuleName
 from ifmap_model import IFMapIdentifier, IFMapProperty, IFMapLink, IFMapLinkAttr, SimpleTypeWrapper
 from type_parser import TypeParserGenerator
 
@@ -92,21 +94,36 @@ void %(class)s::EncodeUpdate(xml_node *node) const {
         cdecl = """
 bool %(class)s::Decode(const xml_node &parent, std::string *id_name,
                        %(class)s *ptr) {
-    for (xml_node node = parent.first_child(); node;
-         node = node.next_sibling()) {
-        if (strcmp(node.name(), "name") == 0) {
-            *id_name = node.child_value();
-        }
 """ % {'class': self.getName() }
         file.write(cdecl)
+        if self._identifier.getProperties():
+            file.write('    ptr->property_crc_valid_.reset();\n')
+        cdecl = """    for (xml_node node = parent.first_child(); node;
+         node = node.next_sibling()) {
+        const char *tag = node.name();
+"""
+        file.write(cdecl)
+        cases = [('name', '            *id_name = node.child_value();\n')]
         for prop in self._identifier.getProperties():
-            indent = ' ' * 8
-            file.write(indent + 'if (strcmp(node.name(), "%s") == 0) {\n' %
-                       prop.getName())
+            code = StringIO.StringIO()
             indent = ' ' * 12
             info = prop.getMemberInfo()
             assert info
             if info.isSequence:
+                if info.xsd_object.isComplex() or \
+                   info.sequenceType in ('std::string', 'int'):
+                    cdecl = """
+            size_t count = ptr->%(member)s.size();
+            for (xml_node item = node.first_child(); item;
+                item = item.next_sibling()) {
+                if (strcmp(item.name(), "%(name)s") == 0) {
+                    ++count;
+                }
+            }
+            ptr->%(member)s.reserve(count);""" % {
+                        'member': info.membername,
+                        'name': info.xsd_object.getName()}
+                    code.write(cdecl)
                 cdecl = """
             for (xml_node item = node.first_child(); item;
                 item = item.next_sibling()) {
@@ -114,26 +131,26 @@ bool %(class)s::Decode(const xml_node &parent, std::string *id_name,
                     continue;
                 }
 """ % (info.xsd_object.getName())
-                file.write(cdecl)
+                code.write(cdecl)
                 if info.xsd_object.isComplex():
                     cdecl = """
-                %(type)s var;
-                var.Clear();
-                bool success = var.XmlParse(item);
+                ptr->%(member)s.push_back(%(type)s());
+                bool success = ptr->%(member)s.back().XmlParse(item);
                 if (!success) {
+                    ptr->%(member)s.pop_back();
                     return false;
                 }
-                ptr->%(member)s.push_back(var);
                 ptr->property_set_.set(%(property)s);
 """ % {'type': info.sequenceType, 'member': info.membername, 'property' : prop.getPropertyId()}
-                    file.write(cdecl)
+                    code.write(cdecl)
                 else:
                     indent = ' ' * 16
                     if info.sequenceType == 'std::string':
-                        file.write(indent + 'string var(item.child_value());\n')
-                        file.write(indent + 'ptr->%s.push_back(var);\n' %
+                        code.write(indent + 'ptr->%s.push_back(std::string());\n' %
                                    info.membername)
-                        file.write(indent + 'ptr->property_set_.set(%s);\n' %
+                        code.write(indent + 'ptr->%s.back() = item.child_value();\n' %
+                                   info.membername)
+                        code.write(indent + 'ptr->property_set_.set(%s);\n' %
                                 prop.getPropertyId())
                     elif info.sequenceType == 'int':
                         cdecl = """
@@ -145,12 +162,12 @@ bool %(class)s::Decode(const xml_node &parent, std::string *id_name,
                 ptr->%(member)s.push_back(var);
 		ptr->property_set_.set(%(property)s);
 """ % {'member': info.membername, 'property' : prop.getPropertyId() }
-                        file.write(cdecl)
+                        code.write(cdecl)
                     else:
-                        file.write(indent + '// TODO: unimplemented %s \n'
+                        code.write(indent + '// TODO: unimplemented %s \n'
                                    % info.sequenceType)
                     indent = ' ' * 12
-                file.write(indent + '}\n')
+                code.write(indent + '}\n')
             elif info.isComplex:
                 cdecl = """
             bool success = ptr->%(membername)s_.XmlParse(node);
@@ -159,30 +176,30 @@ bool %(class)s::Decode(const xml_node &parent, std::string *id_name,
             }
             ptr->property_set_.set(%(property)s);
 """ % {'membername' : prop.getPropertyName(), 'property' : prop.getPropertyId()}
-                file.write(cdecl)
+                code.write(cdecl)
             else:
                 if info.ctypename == 'std::string':
-                    file.write(indent + 'ptr->%s = node.child_value();\n' %
+                    code.write(indent + 'ptr->%s = node.child_value();\n' %
                                info.membername)
-                    file.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
+                    code.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
                 elif info.ctypename == 'bool':
-                    file.write(indent + 'ptr->%s = node.text().as_bool();\n' %
+                    code.write(indent + 'ptr->%s = node.text().as_bool();\n' %
                                info.membername)
-                    file.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
+                    code.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
                 elif info.ctypename == 'uint64_t':
                     fmt = 'if (!autogen::ParseUnsignedLong(node, &ptr->%s)) return false;'
-                    file.write(indent + fmt % info.membername)
-                    file.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
+                    code.write(indent + fmt % info.membername)
+                    code.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
                 elif info.ctypename == 'int':
-                    file.write(indent + 
+                    code.write(indent + 
                                'ptr->%s = atoi(node.child_value());\n' %
                                info.membername)
-                    file.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
+                    code.write(indent + 'ptr->property_set_.set(%s);\n' % prop.getPropertyId())
                 else:
-                    file.write(indent + '// TODO: unimplemented\n')
-            indent = ' ' * 8
-            file.write(indent + '}\n')
+                    code.write(indent + '// TODO: unimplemented\n')
+            cases.append((prop.getName(), code.getvalue()))
 
+        GenerateTagDispatch(file, ' ' * 8, 'tag', 'strlen(tag)', cases)
         file.write('    }\n    return true;\n}\n')
 
 class IFMapGenProperty(object):
@@ -326,9 +343,7 @@ bool %s::ParseJsonMetadata(const contrail_rapidjson::Value &parent,
             file.write(decl)
             xtypename = meta.getCTypename()
             if xtypename == 'std::string':
-                file.write('    std::string var;\n')
-                file.write('    if (!autogen::ParseString(parent, &var) return false;\n')
-                file.write('    data->data = var;\n')
+                file.write('    if (!autogen::ParseString(parent, &data->data)) return false;\n')
             file.write('    return true;\n')
             file.write('}\n\n')
 
@@ -351,22 +366,20 @@ bool %(class)s::Decode(const xml_node &parent, std::string *id_name,
                        %(class)s *ptr) {
     for (xml_node node = parent.first_child(); node;
          node = node.next_sibling()) {
-        if (strcmp(node.name(), "name") == 0) {
-            *id_name = node.child_value();
-        }
+        const char *tag = node.name();
 """ % {'class': self._meta.getCppName() }
         file.write(cdecl)
+        cases = [('name', '            *id_name = node.child_value();\n')]
         # TODO: Simple type decoding
         if self._meta._xelement.isComplex():
             cdecl = """
-        if (strcmp(node.name(), "value") == 0) {
             bool success = ptr->data_.XmlParse(node);
             if (!success) {
                 return false;
             }
-        }
 """
-            file.write(cdecl)
+            cases.append(('value', cdecl))
+        GenerateTagDispatch(file, ' ' * 8, 'tag', 'strlen(tag)', cases)
         file.write('        }\n    return true;\n}\n')
 
 class IFMapParserGenerator(object):
@@ -7,6 +7,7 @@ import re
 
 from ifmap_global import CamelCase
 from ifmap_model import AmbiguousParentType
+from gen_deps import DependencyTracker
 
 def getLinkInfoType(ident, link_info):
     xlink = ident.getLink(link_info)
@@ -469,9 +470,11 @@ public void set%(caml)s(%(type)s %(field)s) {
             print "-o option must specify directory"
             sys.exit(1)
 
+        deps = DependencyTracker(self._parser, dirname, [__file__])
         for ident in self._identifier_map.values():
             filename = os.path.join(dirname, ident.getCppName() + ".java")
-            self._GenerateClass(ident, filename)
+            if not deps.IsCurrent(filename, ident):
+                self._GenerateClass(ident, filename)
 
         property_types = set([])
         for ctype in self._type_map.values():
@@ -479,4 +482,6 @@ public void set%(caml)s(%(type)s %(field)s) {
 
         for ctype in property_types:
             filename = os.path.join(dirname, ctype.getName() + ".java")
-            self._GenerateTypeClass(ctype, filename)
+            if not deps.IsCurrent(filename, ctype):
+                self._GenerateTypeClass(ctype, filename)
+        deps.Save()
@@ -6,6 +6,8 @@ import os
 import re
 import json
 
+from gen_deps import DependencyTracker
+
 class JsonSchemaGenerator(object):
     def __init__(self, parser, type_map, identifiers, metadata):
         self._parser = parser
@@ -163,15 +165,19 @@ class JsonSchemaGenerator(object):
             sys.exit(1)
         for ctype in self._type_map.values():
             self._GenerateTypeMap(ctype)
+        deps = DependencyTracker(self._parser, dirname, [__file__])
         for ident in self._identifier_map.values():
             self._objectsList.append(ident._name)
             filename = os.path.join(dirname, ident._name + "-schema.json")
-            self._GenerateJavascriptSchema(ident, filename)
+            if not deps.IsCurrent(filename, ident):
+                self._GenerateJavascriptSchema(ident, filename)
         #Generate the file containing the list of all identfiers/objects
         objFileName = os.path.join(dirname, "objectList.json")
-        objFile = self._parser.makeFile(objFileName)
-        objJson = {"objects":self._objectsList}
-        objFile.write(json.dumps(objJson,indent=4))
+        if not deps.IsCurrent(objFileName, self._objectsList):
+            objFile = self._parser.makeFile(objFileName)
+            objJson = {"objects":self._objectsList}
+            objFile.write(json.dumps(objJson,indent=4))
+        deps.Save()
         print "Done!"
         print "Schemas generated under directory: " + dirname
 
@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
+#
+
+"""
+On-disk cache of the annotated schema model.
+
+Parsing and annotating a large schema dominates the run time of the
+generator when the schema has not changed since the previous build.  The
+cache stores the annotated XschemaElement tree, together with the parser
+dictionaries and the IDL annotations, under a key computed from the
+flattened (include-expanded) schema text and the generator options.
+
+Every XschemaElement refers back to the XsdParserGenerator that built
+it.  That reference is stored as a persistent id and bound to the
+current parser generator on load, so the parser generator itself is
+never pickled.
+
+The cache directory is bounded in size: after each store the least
+recently used entries are removed until the total fits.
+"""
+
+import cPickle
+import hashlib
+import logging
+import os
+import tempfile
+
+_PARSER_ID = 'XsdParserGenerator'
+_SUFFIX = '.model'
+
+
+class ModelCache(object):
+    def __init__(self, cachedir, maxsize):
+        """ cachedir is created if needed; maxsize is in bytes.
+        """
+        self._cachedir = cachedir
+        self._maxsize = maxsize
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+
+    @staticmethod
+    def Key(*parts):
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, unicode):
+                part = part.encode('utf-8')
+            digest.update(str(len(part)))
+            digest.update(':')
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _Path(self, key):
+        return os.path.join(self._cachedir, key + _SUFFIX)
+
+    def Load(self, key, parser):
+        """ Return the state stored under key, or None.  Element references
+            to the parser generator are bound to parser.
+        """
+        path = self._Path(key)
+        try:
+            infile = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            unpickler = cPickle.Unpickler(infile)
+            unpickler.persistent_load = \
+                lambda pid: parser if pid == _PARSER_ID else None
+            state = unpickler.load()
+        except Exception, exp:
+            # Truncated or written by an incompatible generator.
+            logger = logging.getLogger('model_cache')
+            logger.warning('discarding model cache entry %s: %s', path, exp)
+            infile.close()
+            self._Remove(path)
+            return None
+        infile.close()
+        # Loading counts as a use for the eviction order.
+        os.utime(path, None)
+        return state
+
+    def Store(self, key, state, parser):
+        fd, tmpname = tempfile.mkstemp(suffix='.tmp', dir=self._cachedir)
+        outfile = os.fdopen(fd, 'wb')
+        try:
+            pickler = cPickle.Pickler(outfile, cPickle.HIGHEST_PROTOCOL)
+            pickler.persistent_id = \
+                lambda obj: _PARSER_ID if obj is parser else None
+            pickler.dump(state)
+            outfile.close()
+            # Concurrent builds may store the same key; rename is atomic.
+            os.rename(tmpname, self._Path(key))
+        except:
+            outfile.close()
+            self._Remove(tmpname)
+            raise
+        self._Evict()
+
+    def _Evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self._cachedir):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self._cachedir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self._maxsize:
+                break
+            self._Remove(path)
+            total -= size
+
+    def _Remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -49,6 +49,16 @@ def process_include_files(infile, outfile, inpath=''):
     prep_schema_doc(infile, outfile, inpath, options)
 
 
+def process_include_tree(infile, inpath=''):
+    """Return the prepared schema as an lxml ElementTree, without
+    serializing it.
+    """
+    options = Values({
+        'force': False,
+        })
+    return prep_schema_tree(infile, inpath, options)
+
+
 #
 # Classes
 
@@ -190,6 +200,12 @@ def make_file(outFileName, options):
 
 
 def prep_schema_doc(infile, outfile, inpath, options):
+    doc2 = prep_schema_tree(infile, inpath, options)
+    doc2.write(outfile)
+    return doc2
+
+
+def prep_schema_tree(infile, inpath, options):
     doc1 = etree.parse(infile)
     root1 = doc1.getroot()
     params = Params()
@@ -204,7 +220,6 @@ def prep_schema_doc(infile, outfile, inpath, options):
     process_groups(root2)
     raise_anon_complextypes(root2)
     doc2 = etree.ElementTree(root2)
-    doc2.write(outfile)
     return doc2
 
 
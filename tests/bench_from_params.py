@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+"""
+Compare the two ways a generated python type class decodes a dict (for
+example a REST response):
+
+  - ctor: the constructor, Type(params_dict=params).
+  - from_params: the classmethod, Type.from_params(params).
+
+The classes are generated from the synthetic schema of
+bench_schema_loading.py, in which every complexType has a child of the
+previous type, so decoding the last type decodes all of them.  With
+--sparse, the dicts only have the name and the nested type, as the
+REST API returns them for objects with default values.
+
+With every field present the two are roughly even, within the noise of
+repeated runs.  from_params pays off on sparse dicts, where the
+constructor raises and catches a KeyError for each missing field.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import getopt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+
+from bench_schema_loading import make_schema, load_tree
+from TypeGenerator import TypeGenerator
+
+
+# The generated module imports its base class from generatedssuper.
+GENERATEDS_SUPER = """
+class GeneratedsSuper(object):
+    pass
+
+
+def cast_(typ, value):
+    if typ is None or value is None:
+        return value
+    return typ(value)
+"""
+
+
+def generate_module(dirname, count):
+    path = make_schema(dirname, count)
+    pgenr, root = load_tree(path)
+    outfilename = os.path.join(dirname, 'bench_xsd.py')
+    argv = sys.argv
+    sys.argv = ['generateDS.py', '-f', '-o', outfilename, path]
+    try:
+        pgenr.args_parse()
+    finally:
+        sys.argv = argv
+    generator = TypeGenerator(pgenr)
+    generator.setLanguage('py')
+    generator.generate(root, None, outfilename, genStandAlone=False)
+    outfile = open(os.path.join(dirname, 'generatedssuper.py'), 'w')
+    outfile.write(GENERATEDS_SUPER)
+    outfile.close()
+    sys.path.insert(0, dirname)
+    import bench_xsd
+    return bench_xsd
+
+
+def make_params(n, sparse):
+    params = {u'name': u'object-%d' % n}
+    if not sparse:
+        params.update({
+            u'count': n,
+            u'mode': u'on',
+            u'items': [u'a', u'b', u'c'],
+            })
+    if n:
+        params[u'previous'] = make_params(n - 1, sparse)
+    return params
+
+
+def bench(module, count, sparse, number, repeat):
+    cls = getattr(module, 'Type%d' % (count - 1))
+    params = make_params(count - 1, sparse)
+    results = {}
+    for name, decode in (
+            ('ctor', lambda: cls(params_dict=params)),
+            ('from_params', lambda: cls.from_params(params))):
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            for j in xrange(number):
+                obj = decode()
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results[name] = (number * count / best, obj)
+    return results
+
+
+USAGE_TEXT = """
+Usage:
+    python bench_from_params.py [options]
+Options:
+    -h, --help          Display this help message.
+    -n, --types=N       Nesting depth, the number of complexTypes (default 5).
+    -d, --decodes=N     Number of dicts decoded per run (default 20000).
+    -r, --repeat=N      Report the best of N runs (default 3).
+    -s, --sparse        Leave the optional fields out of the dicts.
+Example:
+    python tests/bench_from_params.py -n 10
+"""
+
+def usage():
+    print USAGE_TEXT
+    sys.exit(-1)
+
+
+def main():
+    args = sys.argv[1:]
+    try:
+        opts, args = getopt.getopt(args, 'hn:d:r:s',
+                                   ['help', 'types=', 'decodes=', 'repeat=',
+                                    'sparse'])
+    except:
+        usage()
+    count = 5
+    number = 20000
+    repeat = 3
+    sparse = False
+    for opt, val in opts:
+        if opt in ('-h', '--help'):
+            usage()
+        elif opt in ('-n', '--types'):
+            count = int(val)
+        elif opt in ('-d', '--decodes'):
+            number = int(val)
+        elif opt in ('-r', '--repeat'):
+            repeat = int(val)
+        elif opt in ('-s', '--sparse'):
+            sparse = True
+    if len(args) != 0 or count < 1:
+        usage()
+    dirname = tempfile.mkdtemp()
+    try:
+        module = generate_module(dirname, count)
+        results = bench(module, count, sparse, number, repeat)
+    finally:
+        shutil.rmtree(dirname)
+    ctor_rate, ctor_obj = results['ctor']
+    fast_rate, fast_obj = results['from_params']
+    print '%d nested objects per dict' % count
+    print 'ctor:        %9.0f objects/s' % ctor_rate
+    print 'from_params: %9.0f objects/s (%.2fx)' % (fast_rate,
+                                                   fast_rate / ctor_rate)
+    if ctor_obj.exportDict() != fast_obj.exportDict():
+        print 'ERROR: the two decoders built different objects'
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+"""
+Compare the two ways generateDS.py loads a schema with includes:
+
+  - sax: process_includes serializes the expanded schema, which is then
+    parsed again by the SAX parser driving XschemaHandler.
+  - tree: the lxml tree built by process_includes is replayed into
+    XschemaHandler directly (generateDS.replay_tree).
+
+The schema is synthetic: a main schema with one element and IDL
+annotation per complexType, including a schema with the complexTypes.
+"""
+
+import os
+import re
+import shutil
+import StringIO
+import sys
+import tempfile
+import time
+import getopt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+
+import generateDS
+import idl_parser
+import process_includes
+from xml.sax import handler, make_parser
+
+
+MAIN_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"
+    xmlns:ifmap="http://www.trustedcomputinggroup.org/2010/IFMAP/2"
+    xmlns:meta="http://www.trustedcomputinggroup.org/2010/IFMAP-METADATA/2"
+    targetNamespace="http://www.contrailsystems.com/bench.xsd">
+<xsd:include schemaLocation="types.xsd"/>
+"""
+
+MAIN_ELEMENT = """
+<xsd:element name="object-%(n)d-property" type="Type%(n)d"/>
+<!--#IFMAP-SEMANTICS-IDL
+     Property('object-%(n)d-property', 'object-%(n)d', 'optional', 'CRUD',
+              'Property of object %(n)d.') -->
+"""
+
+TYPES_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+<xsd:simpleType name="ModeType">
+    <xsd:restriction base="xsd:string">
+        <xsd:enumeration value="on"/>
+        <xsd:enumeration value="off"/>
+    </xsd:restriction>
+</xsd:simpleType>
+"""
+
+TYPES_COMPLEX = """
+<xsd:complexType name="Type%(n)d">
+    <xsd:annotation>
+        <xsd:documentation>Synthetic type %(n)d.</xsd:documentation>
+    </xsd:annotation>
+    <xsd:sequence>
+        <xsd:element name="name" type="xsd:string"/>
+        <xsd:element name="count" type="xsd:integer" default="0"/>
+        <xsd:element name="mode" type="ModeType"/>
+        <xsd:element name="items" type="xsd:string" maxOccurs="unbounded"/>
+%(ref)s    </xsd:sequence>
+    <xsd:attribute name="id" type="xsd:string"/>
+</xsd:complexType>
+"""
+
+TYPES_REF = """        <xsd:element name="previous" type="Type%d"/>
+"""
+
+
+def make_schema(dirname, count):
+    outfile = open(os.path.join(dirname, 'types.xsd'), 'w')
+    outfile.write(TYPES_HEAD)
+    for n in range(count):
+        ref = TYPES_REF % (n - 1) if n else ''
+        outfile.write(TYPES_COMPLEX % {'n': n, 'ref': ref})
+    outfile.write('</xsd:schema>\n')
+    outfile.close()
+    path = os.path.join(dirname, 'main.xsd')
+    outfile = open(path, 'w')
+    outfile.write(MAIN_HEAD)
+    for n in range(count):
+        outfile.write(MAIN_ELEMENT % {'n': n})
+    outfile.write('</xsd:schema>\n')
+    outfile.close()
+    return path
+
+
+def load_sax(path):
+    pgenr = generateDS.XsdParserGenerator()
+    pgenr.IdlParser = idl_parser.IDLParser()
+    outfile = StringIO.StringIO()
+    process_includes.process_include_files(open(path), outfile, inpath=path)
+    outfile.seek(0)
+    dh = generateDS.XschemaHandler(pgenr)
+    parser = make_parser()
+    parser.setContentHandler(dh)
+    parser.setProperty(handler.property_lexical_handler, dh)
+    parser.parse(outfile)
+    root = dh.getRoot()
+    root.annotate()
+    return pgenr, root
+
+
+def load_tree(path):
+    pgenr = generateDS.XsdParserGenerator()
+    pgenr.IdlParser = idl_parser.IDLParser()
+    doc = process_includes.process_include_tree(open(path), inpath=path)
+    dh = generateDS.XschemaHandler(pgenr)
+    generateDS.replay_tree(doc, dh)
+    root = dh.getRoot()
+    root.annotate()
+    return pgenr, root
+
+
+def describe(pgenr, root):
+    outfile = StringIO.StringIO()
+    root.show(outfile, 0)
+    text = re.sub(r'id: \d+', 'id: -', outfile.getvalue())
+    idl = sorted((name, vars(value[0]), value[1:])
+                 for name, value in pgenr.IdlParser._ElementDict.items())
+    return text, sorted(pgenr.ElementDict.keys()), idl
+
+
+def bench(path, repeat):
+    results = {}
+    for name, load in (('sax', load_sax), ('tree', load_tree)):
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            model = load(path)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results[name] = (best, describe(*model))
+    return results
+
+
+USAGE_TEXT = """
+Usage:
+    python bench_schema_loading.py [options]
+Options:
+    -h, --help          Display this help message.
+    -n, --types=N       Number of complexTypes in the schema (default 3000).
+    -r, --repeat=N      Report the best of N runs (default 3).
+Example:
+    python tests/bench_schema_loading.py -n 5000
+"""
+
+def usage():
+    print USAGE_TEXT
+    sys.exit(-1)
+
+
+def main():
+    args = sys.argv[1:]
+    try:
+        opts, args = getopt.getopt(args, 'hn:r:',
+                                   ['help', 'types=', 'repeat='])
+    except:
+        usage()
+    count = 3000
+    repeat = 3
+    for opt, val in opts:
+        if opt in ('-h', '--help'):
+            usage()
+        elif opt in ('-n', '--types'):
+            count = int(val)
+        elif opt in ('-r', '--repeat'):
+            repeat = int(val)
+    if len(args) != 0:
+        usage()
+    dirname = tempfile.mkdtemp()
+    try:
+        path = make_schema(dirname, count)
+        results = bench(path, repeat)
+    finally:
+        shutil.rmtree(dirname)
+    sax_time, sax_model = results['sax']
+    tree_time, tree_model = results['tree']
+    print '%d complexTypes' % count
+    print 'sax:  %.3fs' % sax_time
+    print 'tree: %.3fs (%.2fx)' % (tree_time, sax_time / tree_time)
+    if sax_model != tree_model:
+        print 'ERROR: the two loaders built different models'
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,9 @@
 
 import os
 import sys
+import shutil
 import subprocess
+import tempfile
 import getopt
 import unittest
 
@@ -323,12 +325,102 @@ class GenTest(unittest.TestCase):
 ##         return True
 
 
+# The parts of the generatedssuper module of the python API that the
+#   classes generated from the schema of bench_schema_loading.py use.
+TYPE_CLASS_SUPER = '''
+import re
+
+Tag_pattern_ = re.compile(r'({.*})?(.*)')
+
+
+class GeneratedsSuper(object):
+    def gds_validate_string(self, input_data, node, input_name=''):
+        return input_data
+    def gds_validate_integer(self, input_data, node, input_name=''):
+        return input_data
+
+
+def cast_(typ, value):
+    if typ is None or value is None:
+        return value
+    return typ(value)
+
+
+def find_attr_value_(attr_name, node):
+    return node.attrib.get(attr_name)
+'''
+
+
+class TypeClassTest(unittest.TestCase):
+    """
+    Tests of the python type classes generated for the API (-g device-api)
+    from the synthetic schema of bench_schema_loading.py, in which TypeN
+    has a child named previous of type TypeN-1.
+    """
+    def setUp(self):
+        from bench_schema_loading import make_schema
+        self.dirname = tempfile.mkdtemp()
+        self.schema = make_schema(self.dirname, 3)
+        outfile = open(os.path.join(self.dirname, 'generatedssuper.py'), 'w')
+        outfile.write(TYPE_CLASS_SUPER)
+        outfile.close()
+        sys.path.insert(0, self.dirname)
+
+    def tearDown(self):
+        sys.path.remove(self.dirname)
+        shutil.rmtree(self.dirname)
+
+    def generate(self, name, options):
+        cmd = 'python generateDS.py -f -l py -g device-api %s -o %s %s' % (
+            options, os.path.join(self.dirname, name), self.schema)
+        p = subprocess.Popen(cmd, cwd='..',
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            shell=True)
+        stdout, stderr = p.communicate()
+        self.failUnlessEqual(p.returncode, 0, stderr)
+        return __import__('%s_xsd' % name)
+
+    def test_001_build_with_prefix(self):
+        from lxml import etree
+        module = self.generate('prefix_build', '-p Pfx')
+        node = etree.fromstring(
+            '<previous><name>one</name><items>a</items><items>b</items>'
+            '<previous><name>zero</name></previous></previous>')
+        obj = module.PfxType1()
+        obj.build(node)
+        self.failUnlessEqual(obj.name, 'one')
+        self.failUnlessEqual(obj.items, ['a', 'b'])
+        self.failUnless(isinstance(obj.previous, module.PfxType0))
+        self.failUnlessEqual(obj.previous.name, 'zero')
+
+    def test_002_cached_hash_nested_change(self):
+        module = self.generate('cached_hash', '--cached-hash')
+        def make():
+            return module.Type2(name='two', previous=module.Type1(
+                name='one', previous=module.Type0(name='zero')))
+        obj = make()
+        hash(obj)
+        # Change a child and a grandchild of obj after its hash is cached.
+        obj.previous.set_name('ONE')
+        obj.previous.previous.add_items('a')
+        other = make()
+        other.previous.set_name('ONE')
+        other.previous.previous.add_items('a')
+        hash(other)
+        self.failUnless(other == obj)
+        self.failUnlessEqual(hash(other), hash(obj))
+        self.failUnless(other in set([obj]))
+        self.failIf(make() == obj)
+        self.failIf(make() in set([obj]))
+
+
 # Make the test suite.
 def suite():
     # The following is obsolete.  See Lib/unittest.py.
     #return unittest.makeSuite(GenTest)
     loader = unittest.TestLoader()
     testsuite = loader.loadTestsFromTestCase(GenTest)
+    testsuite.addTests(loader.loadTestsFromTestCase(TypeClassTest))
     return testsuite
 
 
@@ -1,11 +1,28 @@
 #
 # Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
 #
-from ifmap_global import GetModuleName
+from ifmap_global import GetModuleName, CRC32_TYPE, HASH64_TYPE, HASH64_DECL, \
+    DIFF_DECL, GenerateDiffCase
+
+def MemberId(member):
+    """ The name of the enum value of member in the MemberId of its type.
+    """
+    return member.membername.upper()
+
+def MemberDiffTest(member, lhs, rhs):
+    """ The C++ expression telling whether lhs and rhs, two values of
+        member, differ.
+    """
+    if member.isComplex and member.isSequence:
+        return 'DiffSequence(%s, %s)' % (lhs, rhs)
+    elif member.isComplex:
+        return '%s.Diff(%s, NULL)' % (lhs, rhs)
+    return '%s != %s' % (lhs, rhs)
 
 class TypeClassGenerator(object):
-    def __init__(self, cTypeDict):
+    def __init__(self, cTypeDict, crcType=CRC32_TYPE):
         self._cTypeDict = cTypeDict
+        self._crcType = crcType
         self._generated_types = { }
 
     def _GenerateTypeSub(self, file, ctype):
@@ -35,6 +52,10 @@ class TypeClassGenerator(object):
         
         for member in ctype.getDataMembers():
             file.write('    %s %s;\n' % (member.ctypename, member.membername))
+        file.write('\n    enum MemberId {\n')
+        for member in ctype.getDataMembers():
+            file.write('        %s,\n' % MemberId(member))
+        file.write('        MEMBER_ID_COUNT\n    };\n')
         tail = """
     void Clear();
     void Copy(const %s &rhs);
@@ -42,12 +63,13 @@ class TypeClassGenerator(object):
     static bool XmlParseProperty(const pugi::xml_node &node,
                                  std::auto_ptr<AutogenProperty> *resultp);
     void Encode(pugi::xml_node *node) const;
-    void CalculateCrc(boost::crc_32_type *crc) const;
+    void CalculateCrc(%s *crc) const;
+    bool Diff(const %s &rhs, boost::dynamic_bitset<> *changed) const;
     bool JsonParse(const contrail_rapidjson::Value &node);
     static bool JsonParseProperty(const contrail_rapidjson::Value &node,
                                   std::auto_ptr<AutogenProperty> *resultp);
 };
-""" % (ctype.getName())
+""" % (ctype.getName(), self._crcType, ctype.getName())
         file.write(tail)
 
     def GenerateType(self, file, ctype):
@@ -75,11 +97,12 @@ class xml_document;
 #include "rapidjson/document.h"
 
 #include "ifmap/autogen.h"
-
-namespace autogen {
-
 """ % {'modname': module_name.upper()}
         file.write(header)
+        if self._crcType == HASH64_TYPE:
+            file.write(HASH64_DECL)
+        file.write(DIFF_DECL)
+        file.write('\nnamespace autogen {\n\n')
         self.GenerateType(file, ctype)
         file.write('}  // namespace autogen\n')
         file.write('#endif  // __SCHEMA__%s_TYPES_H__\n' %
@@ -87,8 +110,9 @@ namespace autogen {
         pass
 
 class TypeImplGenerator(object):
-    def __init__(self, cTypeDict):
+    def __init__(self, cTypeDict, crcType=CRC32_TYPE):
         self._cTypeDict = cTypeDict
+        self._crcType = crcType
         pass
 
     def GenerateType(self, file, ctype):
@@ -141,8 +165,8 @@ void %s::Copy(const %s &rhs) {
         file.write('};\n')
 
         crcdef = """
-void %s::CalculateCrc(boost::crc_32_type *crc) const {
-""" % ctype.getName()
+void %s::CalculateCrc(%s *crc) const {
+""" % (ctype.getName(), self._crcType)
         file.write(crcdef)
         indent_l1 = ' ' * 4
         indent_l11 = ' ' * 9
@@ -191,6 +215,23 @@ void %s::CalculateCrc(boost::crc_32_type *crc) const {
 
         file.write('};\n')
 
+        diffdef = """
+bool %(class)s::Diff(const %(class)s &rhs,
+        boost::dynamic_bitset<> *changed) const {
+    if (changed != NULL) {
+        changed->clear();
+        changed->resize(MEMBER_ID_COUNT);
+    }
+""" % {'class': ctype.getName()}
+        file.write(diffdef)
+        for member in ctype.getDataMembers():
+            GenerateDiffCase(file, ' ' * 4,
+                             MemberDiffTest(member, member.membername,
+                                            'rhs.' + member.membername),
+                             MemberId(member))
+        file.write('    return changed != NULL && changed->any();\n')
+        file.write('}\n')
+
     def Generate(self, hdrname, file):
         module_name = GetModuleName(file, '_types.h')
         header = """
@@ -2,6 +2,11 @@
 # Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
 #
 
+import json
+import StringIO
+
+from ifmap_global import GenerateTagDispatch
+
 class TypeParserGenerator(object):
     def __init__(self, cTypeDict):
         self._cTypeDict = cTypeDict
@@ -21,69 +26,88 @@ bool %s::JsonParse(const contrail_rapidjson::Value &parent) {
             file.write(
                 '        const contrail_rapidjson::Value &value_node = itr->value;\n')
             file.write('        if (value_node.IsNull()) continue;\n')
-            file.write('        std::string var;\n')
-            file.write('        if (!autogen::ParseString(itr->name, &var)) return false;\n')
+            file.write('        const char *tag = itr->name.GetString();\n')
+        cases = []
         for member in ctype.getDataMembers():
             object_name = member.xsd_object.getName()
             object_name = object_name.replace('-', '_')
-            file.write('        if (strcmp(var.c_str(), "%s") == 0) {\n' % object_name)
+            code = StringIO.StringIO()
             indent = ' ' * 12
             cpptype = member.ctypename
             if cpptype == 'int':
                 fmt = 'if (!ParseInteger(value_node, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'uint64_t':
                 fmt = 'if (!ParseUnsignedLong(value_node, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'bool':
                 fmt = 'if (!ParseBoolean(value_node, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'std::string':
-                file.write(indent + 'std::string var;\n')
-                file.write(indent +
-                           'if (!autogen::ParseString(value_node, &var)) return false;\n')
-                fmt = '%s = var;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + 'if (value_node.IsString()) {\n')
+                fmt = '    %s.assign(value_node.GetString(),\n'
+                code.write(indent + fmt % member.membername)
+                code.write(indent + '        value_node.GetStringLength());\n')
+                fmt = '} else if (!autogen::ParseString(value_node, &%s)) {\n'
+                code.write(indent + fmt % member.membername)
+                code.write(indent + '    return false;\n')
+                code.write(indent + '}\n')
             elif cpptype == 'time_t':
                 if member.xsd_object.getType() == 'xsd:dateTime':
                     fmt = 'if (!ParseDateTime(value_node, &%s)) return false;\n'
-                    file.write(indent + fmt % member.membername)
+                    code.write(indent + fmt % member.membername)
                 elif member.xsd_object.getType() == 'xsd:time':
                     fmt = 'if (!ParseTime(value_node, &%s)) return false;\n'
-                    file.write(indent + fmt % member.membername)
+                    code.write(indent + fmt % member.membername)
             elif member.isSequence:
                 indent1 = ' ' * 16
-                file.write(indent +
+                code.write(indent +
                            'if (!value_node.IsArray()) return false;\n')
-                file.write(indent +
+                if member.isComplex or \
+                   member.sequenceType in ('std::string', 'int'):
+                    fmt = '%s.reserve(%s.size() + value_node.Size());\n'
+                    code.write(indent + fmt % (member.membername,
+                                               member.membername))
+                code.write(indent +
                     'for (size_t i = 0; i < value_node.Size(); ++i) {\n')
                 if member.isComplex:
-                    file.write(indent1 + '%s var;\n' % member.sequenceType)
-                    file.write(indent1 + 'var.Clear();\n')
-                    file.write(indent1 +
-                        'if (!var.JsonParse(value_node[i])) return false;\n')
-                    file.write(indent1 + '%s.push_back(var);\n' %
-                                member.membername)
+                    item = """\
+                %(member)s.push_back(%(type)s());
+                if (!%(member)s.back().JsonParse(value_node[i])) {
+                    %(member)s.pop_back();
+                    return false;
+                }
+""" % {'member': member.membername, 'type': member.sequenceType}
+                    code.write(item)
                 elif member.sequenceType == 'std::string':
-                    file.write(indent1 + 'std::string var;\n')
-                    file.write(indent1 +
-                               'if (!autogen::ParseString(value_node[i], &var)) return false;\n')
-                    file.write(indent1 + '%s.push_back(var);\n' %
-                               member.membername)
+                    item = """\
+                const contrail_rapidjson::Value &item = value_node[i];
+                %(member)s.push_back(std::string());
+                if (item.IsString()) {
+                    %(member)s.back().assign(item.GetString(),
+                        item.GetStringLength());
+                } else if (!autogen::ParseString(item, &%(member)s.back())) {
+                    %(member)s.pop_back();
+                    return false;
+                }
+""" % {'member': member.membername}
+                    code.write(item)
                 elif member.sequenceType == 'int':
-                    file.write(indent1 + 'int var;\n')
-                    file.write(indent1 +
+                    code.write(indent1 + 'int var;\n')
+                    code.write(indent1 +
                       'if (!ParseInteger(value_node[i], &var)) return false;\n')
-                    file.write(indent1 + '%s.push_back(var);\n' %
+                    code.write(indent1 + '%s.push_back(var);\n' %
                                member.membername)
                 else:
-                    file.write(indent + '// TODO: sequence of ' +
+                    code.write(indent + '// TODO: sequence of ' +
                                member.sequenceType)
-                file.write(indent + '}\n') # end of for loop
+                code.write(indent + '}\n') # end of for loop
             elif member.isComplex:
                 fmt = 'if (!%s.JsonParse(value_node)) return false;\n'
-                file.write(indent + fmt % member.membername)
-            file.write('        }\n')
+                code.write(indent + fmt % member.membername)
+            cases.append((object_name, code.getvalue()))
+        GenerateTagDispatch(file, ' ' * 8, 'tag', 'itr->name.GetStringLength()',
+                            cases)
         file.write('    }\n    return true;\n}\n')
 
         static_fn = """
@@ -107,59 +131,63 @@ bool %s::XmlParse(const xml_node &parent) {
          node = node.next_sibling()) {
 """ % ctype.getName()
         file.write(start)
+        cases = []
         for member in ctype.getDataMembers():
-            file.write('        if (strcmp(node.name(), "%s") == 0) {\n' %
-                       member.xsd_object.getName())
+            code = StringIO.StringIO()
             indent = ' ' * 12
             cpptype = member.ctypename
             if cpptype == 'int':
                 fmt = 'if (!ParseInteger(node, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'uint64_t':
                 fmt = 'if (!ParseUnsignedLong(node, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'bool':
                 fmt = 'if (!ParseBoolean(node, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'std::string':
                 fmt = '%s = node.child_value();\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'time_t':
                 if member.xsd_object.getType() == 'xsd:dateTime':
                     fmt = 'if (!ParseDateTime(node, &%s)) return false;\n'
-                    file.write(indent + fmt % member.membername)
+                    code.write(indent + fmt % member.membername)
                 elif member.xsd_object.getType() == 'xsd:time':
                     fmt = 'if (!ParseTime(node, &%s)) return false;\n'
-                    file.write(indent + fmt % member.membername)
+                    code.write(indent + fmt % member.membername)
             elif member.isSequence:
                 if member.isComplex:
                     item = """
-            %s var;
-            var.Clear();
-            if (!var.XmlParse(node)) return false;
-            %s.push_back(var);
-""" % (member.sequenceType, member.membername)
-                    file.write(item)
+            %(member)s.push_back(%(type)s());
+            if (!%(member)s.back().XmlParse(node)) {
+                %(member)s.pop_back();
+                return false;
+            }
+""" % {'member': member.membername, 'type': member.sequenceType}
+                    code.write(item)
                 elif member.sequenceType == 'std::string':
                     item = """
-            string var(node.child_value());
-            %s.push_back(var);
-""" % member.membername
-                    file.write(item)
+            %s.push_back(std::string());
+            %s.back() = node.child_value();
+""" % (member.membername, member.membername)
+                    code.write(item)
                 elif member.sequenceType == 'int':
                     item = """
             int var;
             if (!ParseInteger(node, &var)) return false;
             %s.push_back(var);
 """ % member.membername
-                    file.write(item)
+                    code.write(item)
                 else:
-                    file.write(' ' * 12 + '// TODO: sequence of '
+                    code.write(' ' * 12 + '// TODO: sequence of '
                                + member.sequenceType)
             elif member.isComplex:
                 fmt = 'if (!%s.XmlParse(node)) return false;\n'
-                file.write(indent + fmt % member.membername)
-            file.write('        }\n')
+                code.write(indent + fmt % member.membername)
+            cases.append((member.xsd_object.getName(), code.getvalue()))
+        if cases:
+            file.write('        const char *tag = node.name();\n')
+        GenerateTagDispatch(file, ' ' * 8, 'tag', 'strlen(tag)', cases)
         file.write('    }\n    return true;\n}\n')
 
         static_fn = """
@@ -283,24 +311,27 @@ bool %s::XmlParse(const xml_node &parent) {
          attr = attr.next_attribute()) {
 """ % ctype.getName()
         file.write(start)
+        cases = []
         for member in ctype.getDataMembers():
-            file.write('        if (strcmp(attr.name(), "%s") == 0) {\n' %
-                       member.xsd_object.getName())
+            code = StringIO.StringIO()
             indent = ' ' * 12
             cpptype = member.ctypename
             if cpptype == 'int':
                 fmt = 'if (!ParseInteger(attr, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'uint64_t':
                 fmt = 'if (!ParseUnsignedLong(attr, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'bool':
                 fmt = 'if (!ParseBoolean(attr, &%s)) return false;\n'
-                file.write(indent + fmt % member.membername)
+                code.write(indent + fmt % member.membername)
             elif cpptype == 'std::string':
                 fmt = '%s = attr.value();\n'
-                file.write(indent + fmt % member.membername)
-            file.write('        }\n')
+                code.write(indent + fmt % member.membername)
+            cases.append((member.xsd_object.getName(), code.getvalue()))
+        if cases:
+            file.write('        const char *tag = attr.name();\n')
+        GenerateTagDispatch(file, ' ' * 8, 'tag', 'strlen(tag)', cases)
         file.write('    }\n    return true;\n}\n')
 
         static_fn = """
@@ -389,3 +420,114 @@ namespace autogen {
                 self.GenerateTypeParser(file, ctype)
                 self.GenerateJsonTypeParser(file, ctype)
         file.write('}  // namespace autogen\n')
+
+    def _JsonSample(self, ctype, stack):
+        """ A JSON object setting the members of ctype that JsonParse
+            decodes, for the benchmark.  Members of the types in stack are
+            left out, to stop at recursive types.
+        """
+        sample = {}
+        stack = stack + [ctype.getName()]
+        for member in ctype.getDataMembers():
+            key = member.xsd_object.getName().replace('-', '_')
+            if member.isSequence:
+                cpptype = member.sequenceType
+            else:
+                cpptype = member.ctypename
+            if member.isComplex:
+                child = self._cTypeDict.get(cpptype)
+                if child is None or child._is_attribute or \
+                   child.getName() in stack:
+                    continue
+                value = self._JsonSample(child, stack)
+            elif cpptype == 'std::string':
+                value = key
+            elif cpptype in ('int', 'uint64_t'):
+                value = 1
+            elif cpptype == 'bool' and not member.isSequence:
+                value = True
+            else:
+                continue
+            if member.isSequence:
+                value = [value, value]
+            sample[key] = value
+        return sample
+
+    def GenerateBench(self, file, hdrname):
+        """ Write a program timing the JsonParse method of each type on a
+            document setting all its members:
+                <prefix>_parser_bench [iterations [type]]
+        """
+        header = """//
+// Micro-benchmark of the JSON parsers of %s.
+//
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "%s"
+#include "base/autogen_util.h"
+#include "rapidjson/document.h"
+
+namespace {
+
+template <typename T>
+bool JsonParseBench(const contrail_rapidjson::Value &value) {
+    T obj;
+    return obj.JsonParse(value);
+}
+
+struct BenchCase {
+    const char *name;
+    const char *json;
+    bool (*parse)(const contrail_rapidjson::Value &value);
+};
+
+const BenchCase bench_cases[] = {
+""" % (hdrname, hdrname)
+        file.write(header)
+        for name in sorted(self._cTypeDict.keys()):
+            ctype = self._cTypeDict[name]
+            if ctype._is_attribute:
+                continue
+            text = json.dumps(self._JsonSample(ctype, []), sort_keys=True)
+            text = text.replace('\\', '\\\\').replace('"', '\\"')
+            file.write('    { "%s",\n      "%s",\n' % (name, text))
+            file.write('      &JsonParseBench<autogen::%s> },\n' % name)
+        footer = """};
+
+double Now() {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec * 1e-9;
+}
+
+}  // namespace
+
+int main(int argc, char *argv[]) {
+    int iterations = argc > 1 ? atoi(argv[1]) : 100000;
+    const char *only = argc > 2 ? argv[2] : NULL;
+    int status = 0;
+    for (size_t i = 0; i < sizeof(bench_cases) / sizeof(bench_cases[0]); ++i) {
+        const BenchCase &bench = bench_cases[i];
+        if (only != NULL && strcmp(only, bench.name) != 0) continue;
+        contrail_rapidjson::Document doc;
+        doc.Parse<0>(bench.json);
+        if (doc.HasParseError() || !bench.parse(doc)) {
+            fprintf(stderr, "%s: parse error\\n", bench.name);
+            status = 1;
+            continue;
+        }
+        double start = Now();
+        for (int n = 0; n < iterations; ++n) {
+            bench.parse(doc);
+        }
+        printf("%-40s %10.1f ns\\n", bench.name,
+               (Now() - start) * 1e9 / iterations);
+    }
+    return status;
+}
+"""
+        file.write(footer)